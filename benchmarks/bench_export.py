@@ -0,0 +1,72 @@
+"""Скорость экспорта сессии в разные форматы.
+
+Синтетическая сессия (по умолчанию 100 тыс. записей) сохраняется во все
+поддерживаемые форматы; для сравнения замеряется прежний путь через
+pandas.DataFrame.to_excel.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_export.py [--rows 100000] [--no-baseline]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steel_export import WRITERS, export_columns  # noqa: E402
+from steel_session import EXPORT_COLUMNS, SessionRecord, SessionStore  # noqa: E402
+
+
+def make_session(rows, seed=0):
+    """Сессия со случайными записями по нескольким маркам"""
+    rng = random.Random(seed)
+    grades = ["08", "20", "40Х", "12Х18Н10Т", "09Г2С", "ШХ15"]
+    store = SessionStore()
+    for _ in range(rows):
+        length = rng.randint(1000, 24000)
+        alpha = rng.uniform(11.0, 19.0)
+        env, cut = rng.randint(0, 40), rng.randint(700, 1100)
+        shrinkage = alpha * 1e-6 * (cut - env) * length
+        store.append(SessionRecord(rng.choice(grades), env, cut, alpha, length,
+                                   shrinkage, length + shrinkage, 0, 0))
+    return store
+
+
+def pandas_baseline(columns, path):
+    import pandas as pd
+
+    df = pd.DataFrame({title: columns[key] for key, title in EXPORT_COLUMNS.items()})
+    df.to_excel(path, index=False, engine="openpyxl")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--no-baseline", action="store_true", help="не замерять pandas.to_excel")
+    args = parser.parse_args(argv)
+
+    columns = make_session(args.rows).columns()
+    print(f"{'формат':>10} {'время, с':>10} {'строк/с':>12} {'размер, КБ':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        runs = [(ext, export_columns) for ext in sorted(set(WRITERS) - {".feather"})]
+        if not args.no_baseline:
+            runs.append((".xlsx (pandas)", pandas_baseline))
+
+        for name, func in runs:
+            path = os.path.join(tmp, "session" + name.split()[0])
+            start = time.perf_counter()
+            try:
+                func(columns, path)
+            except ValueError as e:
+                print(f"{name:>10} пропущен: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            size = os.path.getsize(path) / 1024
+            print(f"{name:>10} {elapsed:10.3f} {args.rows / elapsed:12.0f} {size:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
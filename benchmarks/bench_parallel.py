@@ -0,0 +1,52 @@
+"""Масштабирование параллельного расчета по числу процессов.
+
+Синтетический график (по умолчанию 2 млн строк) считается сначала в одном
+процессе через steel_engine.compute_batch, затем через ParallelCalculator
+с разным числом исполнителей. Время запуска пула в замер не входит.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_parallel.py [--rows 2000000] [--workers 1 2 4 8]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from steel_data import open_steel_catalog  # noqa: E402
+from steel_engine import AlphaTable, compute_batch  # noqa: E402
+from steel_parallel import ParallelCalculator, default_workers  # noqa: E402
+from suite import make_schedule  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, default_workers()}))
+    args = parser.parse_args(argv)
+
+    table = AlphaTable.from_catalog(open_steel_catalog())
+    schedule = make_schedule(table, args.rows)
+
+    start = time.perf_counter()
+    expected = compute_batch(table, *schedule)
+    single = time.perf_counter() - start
+    print(f"{'процессов':>10} {'время, с':>10} {'строк/с':>12} {'ускорение':>10}")
+    print(f"{'-':>10} {single:10.3f} {args.rows / single:12.0f} {1.0:10.2f}")
+
+    for workers in args.workers:
+        with ParallelCalculator(workers) as calculator:
+            calculator.compute(*(column[:1] for column in schedule))  # прогрев пула
+            start = time.perf_counter()
+            result = calculator.compute(*schedule)
+            elapsed = time.perf_counter() - start
+        assert np.array_equal(result.cut_length, expected.cut_length, equal_nan=True)
+        print(f"{workers:>10} {elapsed:10.3f} {args.rows / elapsed:12.0f} {single / elapsed:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Замер времени запуска калькулятора и проверка бюджета.
+
+Каждый замер выполняется в отдельном процессе, чтобы учитывать холодный
+импорт модулей. Если доступен дисплей, дополнительно измеряется время до
+первой отрисовки окна с заполненным списком марок.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_startup.py [--runs 5] [--budget 1.0]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Бюджет времени запуска (секунды) до появления окна
+STARTUP_BUDGET_S = 1.0
+
+IMPORT_PROBE = """
+import time
+start = time.perf_counter()
+import steel_calculator
+print(time.perf_counter() - start)
+"""
+
+# Журнал сессии открывается во временном каталоге, чтобы не трогать данные оператора
+WINDOW_PROBE = """
+import os
+import tempfile
+import time
+start = time.perf_counter()
+import tkinter as tk
+import steel_calculator
+with tempfile.TemporaryDirectory() as tmp:
+    root = tk.Tk()
+    app = steel_calculator.SteelAlphaCalculator(root, os.path.join(tmp, "journal.sqlite3"))
+    root.update()
+    assert app.grade_combo["values"]
+    print(time.perf_counter() - start)
+    app.on_close()
+"""
+
+
+def measure(probe, runs):
+    """Медиана времени выполнения пробы в отдельных процессах"""
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", probe],
+            cwd=ROOT, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            return None
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_S)
+    args = parser.parse_args(argv)
+
+    import_time = measure(IMPORT_PROBE, args.runs)
+    print(f"Импорт steel_calculator: {import_time:.3f} с")
+
+    window_time = measure(WINDOW_PROBE, args.runs)
+    if window_time is None:
+        print("Окно: нет дисплея, замер пропущен")
+        elapsed = import_time
+    else:
+        print(f"Первая отрисовка окна: {window_time:.3f} с")
+        elapsed = window_time
+
+    if elapsed > args.budget:
+        print(f"Бюджет запуска превышен: {elapsed:.3f} с > {args.budget:.3f} с")
+        return 1
+    print(f"Бюджет запуска соблюден ({args.budget:.3f} с)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,408 @@
+"""Набор замеров и контрольных значений расчетного ядра.
+
+Замеры выполняются на синтетических справочниках (10 - 10 000 марок) и
+графиках (1 - 1 млн строк):
+
+    alpha_at      поиск α одной марки (бинарный поиск интервала)
+    cached_alpha  то же через LRU-кэш таблицы
+    grade_lookup  номера строк таблицы для массива марок
+    interpolate   векторная интерполяция α
+    batch         полный расчет compute_batch (batch_<модель> - для остальных
+                  моделей расширения steel_models)
+    inverse       обратный расчет solve_lengths (холодная длина по длине порезки)
+    search        поиск марок по подстроке (как при наборе в списке марок)
+    load_json     чтение и проверка JSON-справочника
+    compile       компиляция справочника в двоичный файл
+    open_catalog  открытие скомпилированного справочника (mmap)
+    export_csv, export_xlsx  экспорт сессии
+    schedule      потоковый расчет графика CSV
+
+Результаты сохраняются в JSON (--save) и сравниваются с базовым файлом
+(--baseline): замер, пропускная способность которого упала больше чем на
+--tolerance, считается регрессией, и программа завершается с кодом 1.
+Базовый файл снимается на той же машине, что и проверка.
+
+Контрольные значения (pins.json) фиксируют длины порезки по всем маркам
+поставляемого data/steel_data.json для каждой модели расширения
+(steel_models.MODELS); --check-pins сверяет с ними расчет всеми путями
+(alpha_at, compute_batch, двоичный справочник) и обратный расчет
+solve_lengths, чтобы оптимизации не меняли результаты незаметно.
+
+--check-nesting сверяет раскрой штанг (steel_nesting) с полным перебором на
+случайных задачах: набранная длина должна совпадать с оптимальной.
+
+Запуск из корня репозитория:
+    python benchmarks/suite.py [--quick] [--save FILE] [--baseline FILE]
+    python benchmarks/suite.py --check-pins
+    python benchmarks/suite.py --check-nesting
+    python benchmarks/suite.py --update-pins
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from steel_data import compile_steel_data, load_steel_data, open_steel_catalog  # noqa: E402
+from steel_engine import AlphaTable, compute_batch, solve_lengths  # noqa: E402
+from steel_export import export_columns  # noqa: E402
+from steel_models import DEFAULT_MODEL, MODELS  # noqa: E402
+from steel_nesting import CutOrder, NestingPlanner, solve_bounded_knapsack  # noqa: E402
+from steel_schedule import process_schedule  # noqa: E402
+from steel_search import GradeSearchIndex  # noqa: E402
+from steel_session import SessionRecord, SessionStore  # noqa: E402
+
+
+PINS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pins.json")
+DATA_PATH = os.path.join(ROOT, "data", "steel_data.json")
+
+FULL_GRADES = (10, 100, 1000, 10000)
+FULL_ROWS = (1, 1000, 100_000, 1_000_000)
+QUICK_GRADES = (10, 1000)
+QUICK_ROWS = (1, 1000, 100_000)
+# Файловые замеры (экспорт, график) дороже остальных и ограничены по строкам
+MAX_FILE_ROWS = 100_000
+
+# Температуры и длины контрольных значений
+PIN_ENV_TEMPS = (0, 20)
+PIN_CUT_TEMPS = (20, 100, 155, 450, 737, 1000, 1150)
+PIN_LENGTH = 12000
+# Допустимое отклонение контрольных значений длины порезки (мм)
+PIN_TOLERANCE_MM = 1e-6
+
+# Число случайных задач раскроя для сверки с перебором
+NESTING_CASES = 300
+
+DEFAULT_TOLERANCE = 0.25
+
+
+# --- Синтетические данные ---
+
+def make_catalog(grades, seed=0):
+    """Справочник в формате steel_data.json: температуры 100-1000 °C, α 10-20"""
+    rng = random.Random(seed)
+    temps = list(range(100, 1001, 100))
+    steel_grades = []
+    for i in range(grades):
+        base = rng.uniform(10.0, 13.0)
+        alphas = [round(base + k * rng.uniform(0.3, 0.8), 2) for k in range(len(temps))]
+        steel_grades.append({"steel_grade": f"{rng.choice('0123456789')}{i}Х{rng.randint(1, 20)}Н{i % 13}",
+                             "alpha": alphas})
+    return {"temperature_values": temps, "steel_grades": steel_grades}
+
+
+def make_schedule(table, rows, seed=0):
+    """Случайный график: марки из справочника, температуры 20-1100 °C"""
+    rng = np.random.default_rng(seed)
+    grades = [table.grades[i] for i in rng.integers(0, len(table), rows)]
+    env = rng.integers(0, 40, rows).astype(np.float64)
+    cut = rng.integers(20, 1100, rows).astype(np.float64)
+    lengths = rng.integers(1000, 24000, rows).astype(np.float64)
+    return grades, env, cut, lengths
+
+
+def make_session(grades, env, cut, lengths):
+    """Сессия из строк графика"""
+    store = SessionStore()
+    for grade, e, c, length in zip(grades, env.tolist(), cut.tolist(), lengths.tolist()):
+        store.append(SessionRecord(grade, e, c, 15.0, length, 1.0, length + 1.0, 0, 0))
+    return store
+
+
+def write_schedule_csv(path, grades, env, cut, lengths):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("grade,env_temp,cut_temp,length\n")
+        for row in zip(grades, env.tolist(), cut.tolist(), lengths.tolist()):
+            file.write("%s,%g,%g,%g\n" % row)
+
+
+# --- Замеры ---
+
+def measure(func, min_time=0.2, repeat=3):
+    """Лучшее из repeat время одного вызова; func вызывается до набора min_time"""
+    func()
+    best = float("inf")
+    for _ in range(repeat):
+        calls, start = 0, time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / calls)
+    return best
+
+
+def run_benchmarks(grade_sizes, row_sizes, log=print):
+    """Все замеры; возвращает {название: {"seconds", "items", "per_second"}}"""
+    results = {}
+
+    def record(name, items, func, **kwargs):
+        seconds = measure(func, **kwargs)
+        results[name] = {"seconds": seconds, "items": items, "per_second": items / seconds}
+        log(f"{name:<36} {seconds * 1e3:12.4f} мс {items / seconds:16.0f} /с")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_grades in grade_sizes:
+            data = make_catalog(n_grades)
+            json_path = os.path.join(tmp, f"catalog_{n_grades}.json")
+            with open(json_path, "w", encoding="utf-8") as file:
+                json.dump(data, file, ensure_ascii=False)
+
+            record(f"load_json/grades={n_grades}", n_grades, lambda: load_steel_data(json_path))
+            bin_path = os.path.join(tmp, f"catalog_{n_grades}.bin")
+            record(f"compile/grades={n_grades}", n_grades,
+                   lambda: compile_steel_data(json_path, bin_path))
+            compile_steel_data(json_path)
+            record(f"open_catalog/grades={n_grades}", n_grades,
+                   lambda: open_steel_catalog(json_path).close())
+
+            table = AlphaTable(load_steel_data(json_path)[0])
+            model_tables = {model: AlphaTable.from_arrays(table.temperatures, table.grades,
+                                                          table.alphas, model=model)
+                            for model in MODELS if model != DEFAULT_MODEL}
+            names = table.grades
+            probe = [(names[i % n_grades], 20 + (i * 37) % 1080) for i in range(1000)]
+            record(f"alpha_at/grades={n_grades}", len(probe),
+                   lambda: [table.alpha_at(g, t) for g, t in probe])
+            record(f"cached_alpha/grades={n_grades}", len(probe),
+                   lambda: [table.cached_alpha(g, t) for g, t in probe])
+
+            index = GradeSearchIndex(names)
+            queries = [names[i][:k] for i in range(0, n_grades, max(1, n_grades // 20))
+                       for k in (1, 2, 3)]
+            record(f"search/grades={n_grades}", len(queries),
+                   lambda: [index.search(q) for q in queries])
+
+            for n_rows in row_sizes:
+                grades, env, cut, lengths = make_schedule(table, n_rows)
+                suffix = f"grades={n_grades}/rows={n_rows}"
+                record(f"grade_lookup/{suffix}", n_rows, lambda: table.grade_rows(grades))
+                rows = table.grade_rows(grades)
+                record(f"interpolate/{suffix}", n_rows, lambda: table.interpolate(rows, cut))
+                record(f"batch/{suffix}", n_rows,
+                       lambda: compute_batch(table, grades, env, cut, lengths))
+                hot = lengths * 1.01
+                record(f"inverse/{suffix}", n_rows,
+                       lambda: solve_lengths(table, grades, env, cut, hot))
+                for model, model_table in model_tables.items():
+                    record(f"batch_{model}/{suffix}", n_rows,
+                           lambda: compute_batch(model_table, grades, env, cut, lengths))
+
+        # Файловые замеры зависят от числа строк, а не от размера справочника
+        table = AlphaTable(make_catalog(max(grade_sizes)))
+        for n_rows in row_sizes:
+            if n_rows > MAX_FILE_ROWS:
+                continue
+            grades, env, cut, lengths = make_schedule(table, n_rows)
+            columns = make_session(grades, env, cut, lengths).columns()
+            for ext in (".csv", ".xlsx"):
+                out = os.path.join(tmp, "session" + ext)
+                record(f"export_{ext[1:]}/rows={n_rows}", n_rows,
+                       lambda: export_columns(columns, out), min_time=0.05, repeat=1)
+            schedule_path = os.path.join(tmp, f"schedule_{n_rows}.csv")
+            write_schedule_csv(schedule_path, grades, env, cut, lengths)
+            out = os.path.join(tmp, "schedule_result.csv")
+            record(f"schedule/rows={n_rows}", n_rows,
+                   lambda: process_schedule(table, schedule_path, out), min_time=0.05, repeat=1)
+
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Замеры, пропускная способность которых упала больше допустимого"""
+    regressions = []
+    for name, base in sorted(baseline.get("results", {}).items()):
+        current = results.get(name)
+        if current is None:
+            continue
+        ratio = current["per_second"] / base["per_second"]
+        if ratio < 1.0 - tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+# --- Контрольные значения ---
+
+def pin_cases(table):
+    """Сетка (марка, температура среды, температура порезки, длина) по всем маркам"""
+    return [(grade, env, cut, PIN_LENGTH)
+            for grade in table.grades for env in PIN_ENV_TEMPS for cut in PIN_CUT_TEMPS]
+
+
+def shipped_table(model=DEFAULT_MODEL):
+    return AlphaTable(load_steel_data(DATA_PATH)[0], model=model)
+
+
+def update_pins():
+    models = {}
+    for model in MODELS:
+        table = shipped_table(model)
+        cases = models[model] = []
+        for grade, env, cut, length in pin_cases(table):
+            alpha = table.alpha_at(grade, cut, env)
+            cases.append([grade, env, cut, length, round(length + alpha * 1e-6 * (cut - env) * length, 9)])
+    # Одна строка файла на случай, чтобы изменения были видны в diff
+    with open(PINS_PATH, "w", encoding="utf-8") as file:
+        file.write('{"source": "data/steel_data.json", "models": {')
+        file.write(",".join(
+            f'\n"{model}": [\n' + ",\n".join(json.dumps(case, ensure_ascii=False) for case in cases) + "\n]"
+            for model, cases in models.items()))
+        file.write("\n}}\n")
+    total = sum(len(cases) for cases in models.values())
+    print(f"Записано контрольных значений: {total} (моделей: {len(models)}) -> {PINS_PATH}")
+
+
+def check_pins():
+    """Сверка расчета с pins.json по всем моделям; возвращает список расхождений"""
+    with open(PINS_PATH, encoding="utf-8") as file:
+        pinned = json.load(file)["models"]
+    failures = [f"{model}: нет контрольных значений" for model in MODELS if model not in pinned]
+    catalog = open_steel_catalog(DATA_PATH)
+    total = 0
+    for model, cases in pinned.items():
+        total += len(cases)
+        grades = [case[0] for case in cases]
+        env, cut, lengths, expected = (np.array([case[i] for case in cases], dtype=np.float64)
+                                       for i in range(1, 5))
+
+        tables = {"json": shipped_table(model),
+                  "catalog": AlphaTable.from_catalog(catalog, model=model)}
+        for source, table in tables.items():
+            scalar = np.array([length + table.alpha_at(g, c, e) * 1e-6 * (c - e) * length
+                               for g, e, c, length in zip(grades, env.tolist(), cut.tolist(),
+                                                          lengths.tolist())])
+            batch = compute_batch(table, grades, env, cut, lengths).cut_length
+            # Обратный расчет по закрепленной длине порезки возвращает исходную длину
+            inverse = solve_lengths(table, grades, env, cut, expected).length
+            for path, values, reference in (("alpha_at", scalar, expected),
+                                            ("compute_batch", batch, expected),
+                                            ("solve_lengths", inverse, lengths)):
+                bad = np.flatnonzero(~(np.abs(values - reference) <= PIN_TOLERANCE_MM))
+                for i in bad[:10]:
+                    failures.append(f"{model}/{source}/{path}: {cases[i][:4]} -> {values[i]!r}, "
+                                    f"ожидалось {reference[i]!r}")
+                if len(bad) > 10:
+                    failures.append(f"{model}/{source}/{path}: ... всего расхождений {len(bad)}")
+    return total, failures
+
+
+# --- Сверка раскроя с перебором ---
+
+def brute_force_knapsack(widths, counts, capacity):
+    """Наибольшая сумма длин не больше capacity полным перебором"""
+    best = 0
+    for taken in itertools.product(*(range(count + 1) for count in counts)):
+        total = sum(n * w for n, w in zip(taken, widths))
+        if total <= capacity:
+            best = max(best, total)
+    return best
+
+
+def check_nesting(cases=NESTING_CASES, seed=0):
+    """Сверка solve_bounded_knapsack и NestingPlanner с перебором; список расхождений"""
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(cases):
+        n = rng.randint(1, 4)
+        widths = [rng.randint(300, 6000) for _ in range(n)]
+        counts = [rng.randint(0, 5) for _ in range(n)]
+        capacity = rng.randint(0, 30000)
+        taken, best = solve_bounded_knapsack(widths, counts, capacity)
+        expected = brute_force_knapsack(widths, counts, capacity)
+        total = sum(t * w for t, w in zip(taken, widths))
+        if best != expected or total != best or any(t > c for t, c in zip(taken, counts)):
+            failures.append(f"рюкзак {widths} {counts} {capacity}: {taken} ({best}), ожидалось {expected}")
+
+    # План штанги: заготовки помещаются в штангу, и лучшего набора нет
+    table = shipped_table()
+    for _ in range(cases // 10):
+        grade = rng.choice(table.grades)
+        planner = NestingPlanner(table, grade, rng.uniform(0, 40))
+        orders = [CutOrder(str(k), rng.randint(500, 6000), rng.randint(0, 4))
+                  for k in range(rng.randint(1, 3))]
+        bar, cut = rng.uniform(6000, 24000), rng.uniform(700, 1100)
+        plan = planner.plan(bar, cut, orders)
+        widths = [length + planner.kerf for length in plan.piece_lengths]
+        expected = brute_force_knapsack(widths, [order.count for order in orders], bar)
+        # Длины заготовок и штанги округляются до RESOLUTION_MM, поэтому
+        # допускается недобор не больше шага на заготовку и на штангу
+        slack = planner.resolution * (sum(order.count for order in orders) + 1)
+        if plan.used > bar or plan.used < expected - slack:
+            failures.append(f"план {grade} {orders} {bar:.1f} мм при {cut:.1f} °C: "
+                            f"{plan.pieces} ({plan.used:.1f}), перебор {expected:.1f}")
+    return cases + cases // 10, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="сокращенный набор размеров")
+    parser.add_argument("--grades", type=int, nargs="+", help="размеры справочников")
+    parser.add_argument("--rows", type=int, nargs="+", help="размеры графиков")
+    parser.add_argument("--save", metavar="FILE", help="сохранить результаты в JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="сравнить с базовыми результатами")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="допустимое падение пропускной способности (доля)")
+    parser.add_argument("--check-pins", action="store_true", help="только сверить контрольные значения")
+    parser.add_argument("--update-pins", action="store_true", help="пересчитать контрольные значения")
+    parser.add_argument("--check-nesting", action="store_true", help="только сверить раскрой с перебором")
+    args = parser.parse_args(argv)
+
+    if args.update_pins:
+        update_pins()
+        return 0
+
+    checks = []
+    if not args.check_nesting:
+        checks.append(("Контрольные значения", check_pins))
+    if not args.check_pins:
+        checks.append(("Раскрой против перебора", check_nesting))
+    failed = False
+    for title, check in checks:
+        total, failures = check()
+        for failure in failures:
+            print(failure, file=sys.stderr)
+        print(f"{title}: {total}, расхождений: {len(failures)}")
+        failed = failed or bool(failures)
+    if failed:
+        return 1
+    if args.check_pins or args.check_nesting:
+        return 0
+
+    grade_sizes = args.grades or (QUICK_GRADES if args.quick else FULL_GRADES)
+    row_sizes = args.rows or (QUICK_ROWS if args.quick else FULL_ROWS)
+    results = run_benchmarks(grade_sizes, row_sizes)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "results": results,
+            }, file, ensure_ascii=False, indent=1)
+        print(f"Результаты сохранены: {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for name, ratio in regressions:
+            print(f"Регрессия: {name}: {ratio:.0%} от базового", file=sys.stderr)
+        if regressions:
+            return 1
+        print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
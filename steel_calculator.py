@@ -1,35 +1,226 @@
-import json
-import sys
+import argparse
+import multiprocessing
 import os
+import sqlite3
+import sys
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
-import pandas as pd
-
-def resource_path(relative_path):
-    """ Возвращает правильный путь к файлу, работая как в .py, так и в .exe """
-    if getattr(sys, 'frozen', False):  # Если программа запущена как .exe
-        base_path = sys._MEIPASS  # PyInstaller создаёт временную папку
-    else:
-        base_path = os.path.abspath(".")  # Обычный режим (при запуске .py)
-    return os.path.join(base_path, relative_path)
+from tkinter import ttk, messagebox, filedialog, simpledialog
+
+# NumPy, pandas и модуль экспорта импортируются лениво, чтобы окно появлялось сразу
+from steel_data import (resource_path, open_steel_catalog, empty_catalog, compile_steel_data,
+                        active_data_path, DEFAULT_DATA_PATH)
+from steel_schedule import DEFAULT_CHUNK_SIZE
+from steel_search import GradeSearchIndex, normalize
+from steel_journal import SessionJournal
+from steel_metrics import METRICS, run_profiled, timed
+from steel_reload import DataReloader
+from steel_stream import PyrometerReader
+from steel_session import DISPLAY_FIELDS, SessionRecord, SessionStore, format_record
+from steel_widgets import VirtualTable
+
+# Задержка обновления списка марок после нажатия клавиши (мс)
+SEARCH_DEBOUNCE_MS = 150
+# Период опроса фонового экспорта (мс)
+EXPORT_POLL_MS = 100
+# Период записи журнала сессии на диск (мс)
+JOURNAL_FLUSH_MS = 1000
+# Период проверки обновлений справочника (мс)
+RELOAD_POLL_MS = 2000
+# Период обновления расчета по пирометру (мс): не чаще 10 кадров в секунду
+STREAM_FRAME_MS = 100
 
 class SteelAlphaCalculator:
-    def __init__(self, root):
+    def __init__(self, root, journal_path=None, data_path=None, data_dir=None, model=None,
+                 pyrometer=None):
         self.root = root
         self.root.title("Калькулятор длины порезки")
-        self.session_data = []
+        self.session = SessionStore()
+        self.current_record = None
+
+        # Журнал сессии на диске; ключ записи журнала по номеру записи сессии
+        self.journal = self.open_journal(journal_path)
+        self.journal_ids = []
         
-        # Инициализация данных
-        self.data = self.load_data()
+        # Инициализация данных; справочник обновляется на ходу (poll_data)
+        self.model = model
+        self.pyrometer_spec = pyrometer
+        self.pyrometer = None
+        self._pyrometer_job = None
+        self.reloader = DataReloader(data_path, data_dir, model)
+        self.catalog = self.load_data()
         self.temperatures = self.parse_temperatures()
-        self.all_grades = [grade["steel_grade"] for grade in self.data["steel_grades"]]
-        
-        # Загрузка иконок
-        self.icons = self.load_icons()
+        self.all_grades = list(self.catalog.grades)
+        self.search_index = GradeSearchIndex(self.all_grades)
+        self._search_job = None
+
+        # Таблица α компилируется в фоне вместе с импортом NumPy
+        self._table = None
+        self._table_thread = threading.Thread(target=self.compile_table, daemon=True)
+        self._table_thread.start()
+
+        # Иконки подгружаются после первой отрисовки окна
+        self.icons = dict.fromkeys(('calculate', 'reset', 'add', 'export', 'clear'))
         
         # Построение интерфейса
         self.create_widgets()
         self.configure_bindings()
+        self.restore_session()
+        self.root.after_idle(self.apply_icons)
+        self.root.after(JOURNAL_FLUSH_MS, self.flush_journal)
+        self.root.after(RELOAD_POLL_MS, self.poll_data)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        if pyrometer:
+            self.root.after_idle(self.start_pyrometer, pyrometer)
+
+    def open_journal(self, path):
+        """Открытие журнала сессии; без журнала программа продолжает работу"""
+        try:
+            return SessionJournal(path)
+        except (OSError, sqlite3.Error) as e:
+            messagebox.showwarning("Журнал сессии",
+                                   f"Журнал сессии недоступен, записи не сохранятся:\n{e}")
+            return None
+
+    def restore_session(self):
+        """Восстановление последней сессии из журнала"""
+        if self.journal is None:
+            return
+        for journal_id, record in self.journal.restore():
+            self.session.append(record)
+            self.journal_ids.append(journal_id)
+        self.session_tree.set_rows(self.session.ids())
+
+    def flush_journal(self):
+        """Периодическая запись журнала на диск (занятый журнал пишется позже)"""
+        if self.journal is not None:
+            try:
+                self.journal.flush()
+            except sqlite3.Error as e:
+                self.drop_journal(e)
+        self.root.after(JOURNAL_FLUSH_MS, self.flush_journal)
+
+    def drop_journal(self, error):
+        """Отключение журнала после ошибки записи; сессия продолжается в памяти"""
+        self.journal = None
+        messagebox.showerror("Журнал сессии", f"Ошибка записи журнала: {error}")
+
+    def toggle_pyrometer(self):
+        """Включение и выключение расчета по показаниям пирометра"""
+        if self.pyrometer is not None:
+            self.stop_pyrometer()
+            return
+        spec = simpledialog.askstring(
+            "Пирометр",
+            "Источник показаний (sim, tcp:ХОСТ:ПОРТ, serial:ПОРТ[:СКОРОСТЬ] или путь к файлу):",
+            initialvalue=self.pyrometer_spec or "sim", parent=self.root)
+        if spec:
+            self.pyrometer_spec = spec.strip()
+            self.start_pyrometer(self.pyrometer_spec)
+
+    def start_pyrometer(self, spec):
+        """Запуск чтения пирометра и цикла обновления расчета"""
+        self.pyrometer = PyrometerReader(spec).start()
+        self._pyrometer_shown = None
+        self._pyrometer_stale = False
+        self.pyrometer_btn.config(text="Пирометр: вкл")
+        self.temp_cut_entry.config(state="readonly")
+        self._pyrometer_job = self.root.after(STREAM_FRAME_MS, self.poll_pyrometer)
+
+    def stop_pyrometer(self):
+        if self._pyrometer_job is not None:
+            self.root.after_cancel(self._pyrometer_job)
+            self._pyrometer_job = None
+        if self.pyrometer is not None:
+            self.pyrometer.stop()
+            self.pyrometer = None
+        self.pyrometer_btn.config(text="Пирометр")
+        self.temp_cut_entry.config(state="normal")
+
+    def poll_pyrometer(self):
+        """Кадр потокового режима: последнее сглаженное показание и пересчет.
+
+        Показания между кадрами не обрабатываются по отдельности, поэтому
+        цикл Tk не отстает при любой частоте пирометра. Устаревшее показание
+        не используется: результат сбрасывается до прихода свежих данных.
+        """
+        self._pyrometer_job = None
+        reader = self.pyrometer
+        if reader is None:
+            return
+        if not reader.running:
+            self.stop_pyrometer()
+            if reader.error is not None:
+                messagebox.showerror("Пирометр", f"Ошибка источника: {reader.error}")
+            return
+
+        value, _ = reader.latest()
+        if reader.is_stale():
+            if not self._pyrometer_stale:
+                self.show_pyrometer_stale()
+        elif self._pyrometer_stale or round(value) != self._pyrometer_shown:
+            self._pyrometer_stale = False
+            self.pyrometer_btn.config(text="Пирометр: вкл")
+            self._pyrometer_shown = round(value)
+            with METRICS.timer("pyrometer.frame"):
+                self.temp_cut_entry.config(state="normal")
+                self.temp_cut_entry.delete(0, tk.END)
+                self.temp_cut_entry.insert(0, str(self._pyrometer_shown))
+                self.temp_cut_entry.config(state="readonly")
+                if self.grade_combo.get() and self.cut_type.get():
+                    self.calculate()
+        self._pyrometer_job = self.root.after(STREAM_FRAME_MS, self.poll_pyrometer)
+
+    def show_pyrometer_stale(self):
+        """Сброс результата, рассчитанного по устаревшему показанию пирометра"""
+        self._pyrometer_stale = True
+        self._pyrometer_shown = None
+        self.pyrometer_btn.config(text="Пирометр: нет данных")
+        self.temp_cut_entry.config(state="normal")
+        self.temp_cut_entry.delete(0, tk.END)
+        self.temp_cut_entry.config(state="readonly")
+        self.result_tree.delete(*self.result_tree.get_children())
+        self.current_record = None
+        self.result_length_label.config(text="Нет свежих показаний пирометра")
+
+    def on_close(self):
+        """Запись журнала перед закрытием окна"""
+        self.stop_pyrometer()
+        if self.journal is not None:
+            try:
+                self.journal.close()
+            except sqlite3.Error:
+                pass
+        self.root.destroy()
+
+    @timed("table.compile")
+    def compile_table(self):
+        """Компиляция таблицы коэффициентов α (выполняется в фоновом потоке)"""
+        from steel_engine import AlphaTable
+        self._table = AlphaTable.from_catalog(self.catalog, model=self.model)
+
+    def get_table(self):
+        """Скомпилированная таблица α; при необходимости ждет фоновую компиляцию"""
+        self._table_thread.join()
+        if self._table is None:
+            raise ValueError("Справочник сталей не загружен")
+        return self._table
+
+    @timed("icons.load")
+    def apply_icons(self):
+        """Загрузка иконок и установка их на уже отображенные кнопки"""
+        self.icons = self.load_icons()
+        buttons = {
+            'calculate': self.calc_btn,
+            'reset': self.reset_btn,
+            'add': self.add_btn,
+            'export': self.export_btn,
+            'clear': self.clear_btn
+        }
+        for name, button in buttons.items():
+            if self.icons[name]:
+                button.config(image=self.icons[name], text=" " + button.cget("text"))
 
 
     def load_icons(self):
@@ -43,17 +234,16 @@ class SteelAlphaCalculator:
         }
         
         icon_mapping = {
-            'calculate': 'icons/calculator.png',
-            'reset': 'icons/undo.png',
-            'add': 'icons/add.png',
-            'export': 'icons/excel.png',
-            'clear': 'icons/clean.png'
+            'calculate': 'calculator.png',
+            'reset': 'undo.png',
+            'add': 'add.png',
+            'export': 'excel.png',
+            'clear': 'clean.png'
         }
         
         try:
-            icons_dir = os.path.join(os.path.dirname(__file__), "icons")
             for name, filename in icon_mapping.items():
-                path = resource_path(os.path.join("icons", filename))  # Добавляем "icons/"
+                path = resource_path(os.path.join("icons", filename))
                 if os.path.exists(path):
                     icons[name] = tk.PhotoImage(file=path)
         except Exception as e:
@@ -61,27 +251,67 @@ class SteelAlphaCalculator:
         
         return icons
 
+    @timed("data.load")
     def load_data(self):
-        """Загрузка данных из JSON-файла"""
+        """Загрузка справочника (скомпилированного или из JSON-файла).
+
+        Если внешний справочник поврежден, используется встроенный.
+        """
+        path = self.reloader.current_path()
+        bundled = resource_path(DEFAULT_DATA_PATH)
         try:
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            #json_path = resource_path(os.path.join("data", "steel_data.json"))
-            json_path = resource_path("data/steel_data.json")
-            
-            with open(json_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                
-                if "temperature_values" not in data or "steel_grades" not in data:
-                    raise ValueError("Некорректный формат JSON")
-                
-                return data
+            catalog = open_steel_catalog(path)
         except Exception as e:
-            messagebox.showerror("Ошибка данных", f"Ошибка загрузки: {str(e)}")
-            return {"temperature_values": [], "steel_grades": []}
+            if os.path.abspath(path) == os.path.abspath(bundled):
+                messagebox.showerror("Ошибка данных", f"Ошибка загрузки: {str(e)}")
+                return empty_catalog()
+            messagebox.showwarning("Ошибка данных",
+                                   f"Справочник {path} не загружен:\n{e}\n\n"
+                                   f"Используется встроенный справочник.")
+            try:
+                catalog = open_steel_catalog(bundled)
+            except Exception as e:
+                messagebox.showerror("Ошибка данных", f"Ошибка загрузки: {str(e)}")
+                return empty_catalog()
+
+        if catalog.report and catalog.report.rejected:
+            messagebox.showwarning("Проверка данных", catalog.report.summary())
+        return catalog
+
+    def poll_data(self):
+        """Проверка обновления справочника и подмена данных"""
+        update = self.reloader.poll(self._table)
+        if update is not None:
+            self.apply_data_update(update)
+        self.root.after(RELOAD_POLL_MS, self.poll_data)
+
+    def apply_data_update(self, update):
+        """Подмена справочника, таблицы α и индекса поиска подготовленными в фоне"""
+        if update.error is not None:
+            messagebox.showwarning("Обновление справочника",
+                                   f"Новый справочник не принят, расчет продолжается по прежнему:\n"
+                                   f"{update.error}")
+            return
+
+        # Все ссылки меняются в потоке интерфейса, между событиями Tk
+        self._table_thread.join()
+        self.catalog = update.catalog
+        self.temperatures = self.parse_temperatures()
+        self.all_grades = list(update.catalog.grades)
+        self.search_index = update.search_index
+        self._table = update.table
+        self.apply_search()
+
+        # Окно не блокируется: сведения об обновлении выводятся в заголовке
+        self.root.title(
+            f"Калькулятор длины порезки - справочник обновлен {time.strftime('%H:%M')} "
+            f"(+{len(update.added)}, -{len(update.removed)}, изменено {update.changed})")
+        if update.catalog.report and update.catalog.report.rejected:
+            messagebox.showwarning("Проверка данных", update.catalog.report.summary())
 
     def parse_temperatures(self):
         """Преобразование температур в отсортированный список"""
-        return sorted([int(temp) for temp in self.data["temperature_values"]])
+        return sorted(int(temp) for temp in self.catalog.temperatures)
 
     def create_widgets(self):
         """Построение графического интерфейса"""
@@ -151,11 +381,14 @@ class SteelAlphaCalculator:
                        value="мера", command=self.update_input_fields).pack(side="left", padx=10)
         ttk.Radiobutton(type_frame, text="Крата", variable=self.cut_type,
                        value="крата", command=self.update_input_fields).pack(side="left", padx=10)
+        ttk.Radiobutton(type_frame, text="По длине порезки", variable=self.cut_type,
+                       value="порезка", command=self.update_input_fields).pack(side="left", padx=10)
 
     def create_dynamic_fields(self, parent):
         """Создание динамических полей ввода"""
         self.measure_frame = ttk.Frame(parent)
         self.krata_frame = ttk.Frame(parent)
+        self.hot_frame = ttk.Frame(parent)
 
         # Поля для меры
         ttk.Label(self.measure_frame, text="Длина проката (мм):").pack(side="left", padx=5)
@@ -174,6 +407,12 @@ class SteelAlphaCalculator:
         self.krata_count_entry.config(validatecommand=(self.root.register(self.validate_int), "%P"))
         self.krata_count_entry.pack(side="left")
 
+        # Поле для обратного расчета: длина порезки в горячем состоянии
+        ttk.Label(self.hot_frame, text="Длина порезки (мм):").pack(side="left", padx=5)
+        self.hot_length_entry = ttk.Entry(self.hot_frame, width=15, validate="key")
+        self.hot_length_entry.config(validatecommand=(self.root.register(self.validate_int), "%P"))
+        self.hot_length_entry.pack(side="left")
+
     def create_control_buttons(self, parent):
         """Создание кнопок управления"""
         btn_frame = ttk.Frame(parent)
@@ -199,6 +438,10 @@ class SteelAlphaCalculator:
         )
         self.reset_btn.pack(side="left", padx=5)
 
+        # Кнопка потокового режима (температура порезки от пирометра)
+        self.pyrometer_btn = ttk.Button(btn_frame, text="Пирометр", command=self.toggle_pyrometer)
+        self.pyrometer_btn.pack(side="left", padx=5)
+
     def create_results_frame(self, parent):
         """Создание блока результатов"""
         results_frame = ttk.LabelFrame(parent, text=" Результаты расчетов ", padding=15)
@@ -240,15 +483,25 @@ class SteelAlphaCalculator:
         session_frame = ttk.LabelFrame(parent, text=" Текущая сессия ", padding=15)
         session_frame.grid(row=2, column=0, sticky="nsew", padx=5, pady=5)
 
-        # Таблица сессии
+        # Фильтр по марке или температуре
+        filter_frame = ttk.Frame(session_frame)
+        filter_frame.pack(fill="x", pady=(0, 5))
+        ttk.Label(filter_frame, text="Фильтр (марка или температура):").pack(side="left", padx=5)
+        self.session_filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.session_filter_var, width=20).pack(side="left")
+        self._filter_job = None
+
+        # Таблица сессии: отображаются только видимые строки
         columns = ("Марка стали", "Температура среды (°C)", 
                  "Температура порезки (°C)", "Коэффициент α (×10⁻⁶/K)", 
                  "Длина проката (мм)", "Усадка", "Длина порезки")
-        self.session_tree = ttk.Treeview(session_frame, columns=columns, show="headings", height=5)
         col_widths = [160, 160, 160, 180, 140, 100, 140]
-        for col, width in zip(columns, col_widths):
-            self.session_tree.heading(col, text=col, anchor="center")
-            self.session_tree.column(col, width=width, anchor="center")
+        self.session_tree = VirtualTable(
+            session_frame, columns, col_widths,
+            row_source=lambda record_id: format_record(self.session.get(record_id)),
+            sort_key=lambda column: self.session.sort_key(DISPLAY_FIELDS[column]),
+            height=5
+        )
         self.session_tree.pack(fill="both", expand=True)
 
         # Панель управления сессией
@@ -294,8 +547,9 @@ class SteelAlphaCalculator:
         tooltips = {
             self.calc_btn: "Рассчитать длину порезки",
             self.reset_btn: "Сбросить все параметры",
+            self.pyrometer_btn: "Температура порезки от пирометра с непрерывным пересчетом",
             self.add_btn: "Добавить в текущую сессию",
-            self.export_btn: "Экспорт в Excel",
+            self.export_btn: "Экспорт в Excel, CSV или Parquet",
             self.clear_btn: "Очистить сессию"
         }
         
@@ -330,42 +584,143 @@ class SteelAlphaCalculator:
         """Обновление полей ввода"""
         self.measure_frame.grid_forget()
         self.krata_frame.grid_forget()
+        self.hot_frame.grid_forget()
         
         if self.cut_type.get() == "мера":
             self.measure_frame.grid(row=4, column=0, columnspan=2, pady=5, sticky="w")
         elif self.cut_type.get() == "крата":
             self.krata_frame.grid(row=4, column=0, columnspan=2, pady=5, sticky="w")
+        elif self.cut_type.get() == "порезка":
+            self.hot_frame.grid(row=4, column=0, columnspan=2, pady=5, sticky="w")
 
     def configure_bindings(self):
         """Настройка обработчиков событий"""
         self.grade_combo.bind("<KeyRelease>", self.on_search)
         self.grade_combo.bind("<Return>", lambda e: self.calculate())
+        self.session_tree.bind_tree("<Delete>", lambda e: self.remove_selected())
+        self.session_filter_var.trace_add("write", lambda *args: self.on_session_filter())
+        self.root.bind("<F12>", lambda e: self.show_diagnostics())
+
+    def show_diagnostics(self):
+        """Окно диагностики: таймеры и счетчики программы"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Диагностика")
+        dialog.transient(self.root)
+
+        columns = ("Участок", "Вызовов", "Всего, мс", "Среднее, мс", "Макс., мс", "Последнее, мс")
+        tree = ttk.Treeview(dialog, columns=columns, show="headings", height=12)
+        for col, width in zip(columns, (160, 70, 90, 90, 90, 100)):
+            tree.heading(col, text=col, anchor="center")
+            tree.column(col, width=width, anchor="center")
+        tree.pack(fill="both", expand=True, padx=10, pady=10)
+
+        def refresh():
+            tree.delete(*tree.get_children())
+            snapshot = METRICS.snapshot()
+            for name, stat in sorted(snapshot["timers"].items()):
+                tree.insert("", "end", values=(
+                    name, stat["count"], f"{stat['total_ms']:.1f}", f"{stat['mean_ms']:.2f}",
+                    f"{stat['max_ms']:.2f}", f"{stat['last_ms']:.2f}"))
+            for name, value in sorted(snapshot["counters"].items()):
+                tree.insert("", "end", values=(name, value, "", "", "", ""))
+
+        def reset():
+            METRICS.reset()
+            refresh()
+
+        def save():
+            path = filedialog.asksaveasfilename(parent=dialog, defaultextension=".json",
+                                                filetypes=[("JSON Files", "*.json")])
+            if path:
+                try:
+                    METRICS.dump(path)
+                except OSError as e:
+                    messagebox.showerror("Ошибка", f"Не удалось сохранить: {e}", parent=dialog)
+
+        buttons = ttk.Frame(dialog)
+        buttons.pack(pady=(0, 10))
+        ttk.Button(buttons, text="Обновить", command=refresh).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Сбросить", command=reset).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Сохранить...", command=save).pack(side="left", padx=5)
+        refresh()
 
     def on_search(self, event):
-        """Динамический поиск"""
-        search_term = self.search_var.get().lower()
-        filtered = [g for g in self.all_grades if search_term in g.lower()]
-        self.grade_combo["values"] = filtered
-
+        """Динамический поиск (список обновляется после паузы в наборе)"""
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(SEARCH_DEBOUNCE_MS, self.apply_search)
+
+    @timed("search.filter")
+    def apply_search(self):
+        """Фильтрация списка марок по индексу поиска"""
+        self._search_job = None
+        filtered = self.search_index.search(self.search_var.get())
+        if list(self.grade_combo["values"]) != filtered:
+            self.grade_combo["values"] = filtered
+
+    @timed("session.add")
     def add_to_session(self):
         """Добавление текущего результата в сессию"""
         try:
-            items = self.result_tree.get_children()
-            if not items:
+            if self.current_record is None:
                 raise ValueError("Нет данных для сохранения")
             
-            item_values = self.result_tree.item(items[0], 'values')
-            self.session_data.append(item_values)
-            self.session_tree.insert("", "end", values=item_values)
+            # Сначала журнал: номера записей сессии и ключи журнала идут парами
+            if self.journal is not None:
+                try:
+                    self.journal_ids.append(self.journal.append(self.current_record))
+                except sqlite3.Error as e:
+                    self.drop_journal(e)
+            record_id = self.session.append(self.current_record)
+            if self.session.matches(record_id, *self.session_filter()):
+                self.session_tree.append(record_id)
             
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
 
+    def remove_selected(self):
+        """Удаление выделенных записей сессии"""
+        selected = self.session_tree.selection()
+        for record_id in selected:
+            self.session.remove(record_id)
+        if self.journal is not None:
+            self.journal.remove(self.journal_ids[record_id] for record_id in selected)
+        self.session_tree.remove(selected)
+
+    def session_filter(self):
+        """Разбор строки фильтра: (отбор марок, температура)"""
+        text = self.session_filter_var.get().strip()
+        if not text:
+            return None, None
+        if text.lstrip("-").isdigit():
+            return None, int(text)
+        query = normalize(text)
+        return (lambda name: query in normalize(name)), None
+
+    def on_session_filter(self):
+        """Применение фильтра сессии после паузы в наборе"""
+        if self._filter_job is not None:
+            self.root.after_cancel(self._filter_job)
+        self._filter_job = self.root.after(
+            SEARCH_DEBOUNCE_MS,
+            lambda: self.session_tree.set_rows(self.session.select(*self.session_filter()))
+        )
+
     def clear_session(self):
         """Очистка текущей сессии"""
         if messagebox.askyesno("Подтверждение", "Вы точно хотите очистить текущую сессию?"):
-            self.session_data.clear()
-            self.session_tree.delete(*self.session_tree.get_children())
+            # Новая сессия журнала начинается до очистки, иначе при следующем
+            # запуске восстановились бы только что очищенные записи
+            if self.journal is not None:
+                try:
+                    self.journal.new_session()
+                except (OSError, sqlite3.Error) as e:
+                    messagebox.showerror("Журнал сессии",
+                                         f"Сессия не очищена: журнал недоступен.\n{e}")
+                    return
+            self.session.clear()
+            self.journal_ids = []
+            self.session_tree.clear()
 
     def reset_all(self):
         """Сброс всех полей ввода и результатов"""
@@ -373,43 +728,76 @@ class SteelAlphaCalculator:
         self.temperature_env_entry.delete(0, tk.END)
         self.temp_cut_entry.delete(0, tk.END)
         self.measure_entry.delete(0, tk.END)
+        self.hot_length_entry.delete(0, tk.END)
         self.krata_step_entry.delete(0, tk.END)
         self.krata_count_entry.delete(0, tk.END)
         self.result_tree.delete(*self.result_tree.get_children())
+        self.current_record = None
         self.result_length_label.config(text="")
         self.result_label.config(text="")
 
     def export_to_excel(self):
-        """Экспорт данных сессии в Excel"""
+        """Экспорт данных сессии (Excel, CSV, Parquet, Arrow) в фоновом потоке"""
+        from steel_export import FILE_TYPES, ExportJob
+
         try:
-            if not self.session_data:
+            if not self.session:
                 messagebox.showerror("Ошибка", "Нет данных для экспорта")
                 return
 
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".xlsx",
-                filetypes=[("Excel Files", "*.xlsx")]
+                filetypes=FILE_TYPES
             )
             if not file_path:
                 return
 
-            df = pd.DataFrame(self.session_data, columns=[
-                "Марка стали", "Температура среды (°C)", 
-                "Температура порезки (°C)", "Коэффициент α (×10⁻⁶/K)", 
-                "Длина проката (мм)", "Усадка", "Длина порезки"
-            ])
-            
-            df.to_excel(file_path, index=False, engine='openpyxl')
-            messagebox.showinfo("Успех", f"Файл сохранен:\n{file_path}")
+            # В файл попадают числа, а не отформатированные строки таблицы
+            job = ExportJob(self.session.columns(), file_path).start()
+            self.export_btn.config(state="disabled")
+            self.show_export_progress(job)
 
         except Exception as e:
             messagebox.showerror("Ошибка", f"Ошибка экспорта: {str(e)}")
 
+    def show_export_progress(self, job):
+        """Окно прогресса экспорта с кнопкой отмены"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Экспорт")
+        dialog.transient(self.root)
+        dialog.resizable(False, False)
+
+        ttk.Label(dialog, text=f"Сохранение: {os.path.basename(job.path)}").pack(padx=15, pady=(15, 5))
+        bar = ttk.Progressbar(dialog, length=300, maximum=max(job.total, 1))
+        bar.pack(padx=15, pady=5)
+        ttk.Button(dialog, text="Отмена", command=job.cancel).pack(pady=(5, 15))
+        dialog.protocol("WM_DELETE_WINDOW", job.cancel)
+
+        self.poll_export(job, dialog, bar)
+
+    def poll_export(self, job, dialog, bar):
+        """Обновление прогресса и обработка завершения экспорта"""
+        bar["value"] = job.progress
+        if not job.done:
+            self.root.after(EXPORT_POLL_MS, self.poll_export, job, dialog, bar)
+            return
+
+        dialog.destroy()
+        self.export_btn.config(state="normal")
+        if job.cancelled:
+            return
+        if job.error is not None:
+            messagebox.showerror("Ошибка", f"Ошибка экспорта: {str(job.error)}")
+        else:
+            messagebox.showinfo("Успех", f"Файл сохранен:\n{job.path}")
+
+    @timed("calculate")
     def calculate(self):
         """Основная функция расчета"""
         try:
             self.result_tree.delete(*self.result_tree.get_children())
             self.result_label.config(text="")
+            self.current_record = None
         
             # Сбор данных
             selected_grade = self.grade_combo.get()
@@ -425,54 +813,58 @@ class SteelAlphaCalculator:
             env_temp = int(env_temp)
             temp_cut = int(temp_cut)
 
-            # Поиск данных стали
-            grade_data = next(
-                (g for g in self.data["steel_grades"] if g["steel_grade"] == selected_grade), 
-                None
-            )
-            if not grade_data:
+            # Поиск коэффициента α по скомпилированной таблице
+            table = self.get_table()
+            if selected_grade not in table:
                 raise ValueError("Марка стали не найдена")
+            alpha = table.cached_alpha(selected_grade, temp_cut, env_temp)
 
-            # Расчет коэффициента α
-            lower_temp, upper_temp = self.find_nearest_temperatures(temp_cut)
-            alpha = self.interpolate_alpha(grade_data["alpha"], temp_cut, lower_temp, upper_temp)
+            delta_temp = temp_cut - env_temp
+            factor = 1 + alpha * 1e-6 * delta_temp
 
             # Расчет длины проката
-            if cut_type == "мера":
+            if cut_type == "порезка":
+                hot = self.hot_length_entry.get()
+                if not hot:
+                    raise ValueError("Введите длину порезки")
+                if factor <= 0:
+                    raise ValueError("Некорректные входные данные")
+                # Обратный расчет: длина в холодном состоянии по длине порезки
+                cut_length = int(hot) / factor
+                krata_step = krata_count = 0
+            elif cut_type == "мера":
                 measure = self.measure_entry.get()
                 if not measure:
                     raise ValueError("Введите длину проката")
                 cut_length = int(measure)
-                length_info = f"{cut_length} мм"
+                krata_step = krata_count = 0
             elif cut_type == "крата":
                 step = self.krata_step_entry.get()
                 count = self.krata_count_entry.get()
                 if not all([step, count]):
                     raise ValueError("Заполните все поля для краты")
-                cut_length = int(step) * int(count)
-                length_info = f"{step} × {count}"
+                krata_step, krata_count = int(step), int(count)
+                cut_length = krata_step * krata_count
             else:
                 raise ValueError("Неизвестный тип расчета")
 
             # Расчет параметров
-            delta_temp = temp_cut - env_temp
             shrinkage = alpha * 1e-6 * delta_temp * cut_length
             total_length = cut_length + shrinkage
 
-            # Формирование данных для таблицы
-            values = (
-                selected_grade,
-                f"{env_temp}°C",
-                f"{temp_cut}°C",
-                f"{alpha:.2f}×10⁻⁶/K",
-                length_info,
-                f"{shrinkage:.2f} мм",
-                f"{total_length:.0f} мм"
+            # Запись хранит исходные числа, строки формируются только для таблицы
+            record = SessionRecord(
+                selected_grade, env_temp, temp_cut, alpha, cut_length,
+                shrinkage, total_length, krata_step, krata_count
             )
 
             # Добавление в таблицу
-            self.result_tree.insert("", "end", values=values)
-            self.result_length_label.config(text=f"Расчетная длина порезки: {total_length:.2f} мм")
+            self.result_tree.insert("", "end", values=format_record(record))
+            self.current_record = record
+            if cut_type == "порезка":
+                self.result_length_label.config(text=f"Длина в холодном состоянии: {cut_length:.2f} мм")
+            else:
+                self.result_length_label.config(text=f"Расчетная длина порезки: {total_length:.2f} мм")
 
         except ValueError as ve:
             self.result_label.config(text=str(ve), foreground="red")
@@ -481,50 +873,139 @@ class SteelAlphaCalculator:
             messagebox.showerror("Ошибка", f"Произошла ошибка: {str(e)}")
             self.result_length_label.config(text="")
 
-    def find_nearest_temperatures(self, target_temp):
-        """Поиск ближайших температур"""
-        temps = self.temperatures
-        if not temps:
-            return None, None
-        
-        if target_temp <= temps[0]:
-            return None, temps[0]
-        if target_temp >= temps[-1]:
-            return temps[-1], None
-        
-        left, right = 0, len(temps)-1
-        while left <= right:
-            mid = (left + right) // 2
-            if temps[mid] < target_temp:
-                left = mid + 1
-            else:
-                right = mid - 1
-        return temps[right], temps[left]
+def positive_int(text):
+    """Тип argparse: целое число больше нуля"""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается целое число, получено {text}")
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"ожидается число больше нуля, получено {text}")
+    return value
+
+
+@timed("batch")
+def run_batch(args):
+    """Пакетный расчет графика порезки из командной строки"""
+    from steel_engine import AlphaTable
+    from steel_schedule import default_output_path, process_schedule
+
+    try:
+        output = args.output or default_output_path(args.batch)
+        progress = lambda n: print(f"Обработано строк: {n}", file=sys.stderr)
+        if args.workers > 1:
+            from steel_parallel import ParallelCalculator
+
+            with ParallelCalculator(args.workers, args.data_path, args.model) as calculator:
+                total, failed = process_schedule(
+                    None, args.batch, output, chunk_size=args.chunk_size,
+                    progress=progress, calculator=calculator, inverse=args.inverse,
+                )
+        else:
+            table = AlphaTable.from_catalog(open_steel_catalog(args.data_path), model=args.model)
+            total, failed = process_schedule(
+                table, args.batch, output, chunk_size=args.chunk_size, progress=progress,
+                inverse=args.inverse,
+            )
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+    print(f"Готово: {total} строк, с ошибками: {failed}. Результат: {output}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Калькулятор длины порезки")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="рассчитать график порезки (CSV или XLSX) без интерфейса")
+    parser.add_argument("-o", "--output", metavar="FILE",
+                        help="файл результата (по умолчанию <имя>_result.csv)")
+    parser.add_argument("--inverse", action="store_true",
+                        help="обратный расчет графика: по длине порезки (столбец cut_length) "
+                             "найти длину в холодном состоянии")
+    parser.add_argument("--chunk-size", type=positive_int, default=DEFAULT_CHUNK_SIZE,
+                        help="число строк в обрабатываемом блоке")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="число процессов для пакетного расчета (0 - по числу ядер)")
+    parser.add_argument("--data", metavar="FILE", help="альтернативный файл steel_data.json")
+    parser.add_argument("--model", metavar="NAME",
+                        help="модель коэффициента расширения: linear (по умолчанию), "
+                             "spline или integral")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="запустить локальный HTTP-сервис расчета на порту PORT")
+    parser.add_argument("--data-dir", metavar="DIR",
+                        help="внешний каталог со steel_data.json для всех режимов; "
+                             "интерфейс подхватывает его изменения без перезапуска")
+    parser.add_argument("--journal", metavar="FILE",
+                        help="файл журнала сессии (по умолчанию в каталоге данных пользователя)")
+    parser.add_argument("--diag-log", metavar="FILE",
+                        help="записывать замеры времени в файл (JSON по строке на событие)")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="выполнить программу под cProfile и сохранить статистику в FILE")
+    parser.add_argument("--pyrometer", metavar="SPEC",
+                        help="брать температуру порезки от пирометра: sim, tcp:ХОСТ:ПОРТ, "
+                             "serial:ПОРТ[:СКОРОСТЬ] или путь к файлу/каналу")
+    parser.add_argument("--compile-data", action="store_true",
+                        help="скомпилировать справочник в двоичный формат и выйти")
+    args = parser.parse_args(argv)
+    if args.workers == 0:
+        args.workers = os.cpu_count() or 1
+    if args.model is not None:
+        # Модели требуют NumPy, поэтому модуль импортируется только при явном выборе
+        from steel_models import MODELS
+
+        if args.model not in MODELS:
+            parser.error(f"неизвестная модель {args.model}; доступны: {', '.join(MODELS)}")
+    if args.diag_log:
+        try:
+            METRICS.open_log(args.diag_log)
+        except OSError as e:
+            print(f"Ошибка: {e}", file=sys.stderr)
+            return 1
+
+    if args.profile:
+        return run_profiled(lambda: run(args), args.profile)
+    return run(args)
+
 
-    def interpolate_alpha(self, alphas, target_temp, t1, t2):
-        """Линейная интерполяция коэффициента α"""
+def run(args):
+    """Выполнение выбранного режима программы"""
+    # Все режимы считают по тому же справочнику, что и интерфейс; интерфейс
+    # получает исходные параметры, чтобы подхватить справочник, появившийся позже
+    args.data_path = args.data or active_data_path(args.data_dir)
+
+    if args.compile_data:
+        # Вывод вне try: ошибка кодировки консоли (UnicodeEncodeError - тоже
+        # ValueError) не должна выдаваться за ошибку справочника
         try:
-            if not alphas:
-                raise ValueError("Отсутствуют данные коэффициентов расширения")
-                
-            if t2 is None:
-                return float(alphas[-1])
-            if t1 is None:
-                return float(alphas[0])
-            
-            idx1 = self.temperatures.index(t1)
-            idx2 = self.temperatures.index(t2)
-            
-            if idx1 >= len(alphas) or idx2 >= len(alphas):
-                raise ValueError("Несоответствие данных температур и коэффициентов")
-            
-            return alphas[idx1] + (target_temp - t1) * (alphas[idx2] - alphas[idx1]) / (t2 - t1)
-            
-        except (ValueError, ZeroDivisionError, IndexError) as e:
-            messagebox.showerror("Ошибка данных", f"Ошибка интерполяции: {str(e)}")
-            return 0.0
+            path, report = compile_steel_data(args.data_path)
+        except (OSError, ValueError) as e:
+            print(f"Ошибка: {e}", file=sys.stderr)
+            return 1
+        print(report.summary())
+        print(f"Справочник скомпилирован: {path}")
+        return 0
+
+    if args.batch:
+        return run_batch(args)
+
+    if args.serve is not None:
+        import steel_service
+
+        service_args = ["--port", str(args.serve), "--data", args.data_path]
+        if args.model:
+            service_args += ["--model", args.model]
+        return steel_service.main(service_args)
 
-if __name__ == "__main__":
     root = tk.Tk()
-    app = SteelAlphaCalculator(root)
+    app = SteelAlphaCalculator(root, args.journal, args.data, args.data_dir, args.model,
+                               args.pyrometer)
     root.mainloop()
+    return 0
+
+
+if __name__ == "__main__":
+    # Нужен для пула процессов в собранном PyInstaller exe
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""Загрузка справочника коэффициентов линейного расширения сталей.
+
+Исходные данные хранятся в data/steel_data.json. Для быстрого запуска
+справочник компилируется в двоичный файл рядом с JSON (steel_data.bin):
+заголовок, отсортированные температуры, плотная матрица α (float64, NaN
+на месте пропусков) и таблица названий марок. Двоичный файл отображается
+в память (mmap), поэтому время загрузки почти не зависит от размера
+справочника. Если файл устарел, данные читаются из JSON.
+
+При чтении JSON данные один раз проверяются и нормализуются
+(validate_steel_data): длины массивов сверяются с temperature_values,
+пропуски заполняются по выбранному правилу, непригодные марки
+отбрасываются с записью в отчет. Поэтому в двоичном файле и в таблице α
+нет пропусков, и расчет не проверяет данные при каждом вызове.
+
+Формат (little-endian):
+    заголовок HEADER (48 байт)
+    температуры      float64[n_temps]
+    матрица α        float64[n_grades * n_temps], по строкам
+    смещения имен    uint32[n_grades + 1]
+    имена марок      UTF-8
+"""
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+
+DEFAULT_DATA_PATH = "data/steel_data.json"
+DATA_FILE_NAME = "steel_data.json"
+# Переменная окружения с внешним каталогом данных (обновления справочника)
+DATA_DIR_ENV = "STEEL_DATA_DIR"
+
+MAGIC = b"STLA"
+FORMAT_VERSION = 2
+
+# Правила заполнения пропусков (null) в массивах α
+GAP_INTERPOLATE = "interpolate"  # линейно между соседними значениями
+GAP_NEAREST = "nearest"          # ближайшее по температуре известное значение
+# magic, версия, число марок, число температур, mtime_ns и размер JSON, хэш JSON
+HEADER = struct.Struct("<4sH2xIIqq16s")
+
+
+def resource_path(relative_path):
+    """ Возвращает правильный путь к файлу, работая как в .py, так и в .exe """
+    if getattr(sys, 'frozen', False):  # Если программа запущена как .exe
+        base_path = sys._MEIPASS  # PyInstaller создаёт временную папку
+    else:
+        base_path = os.path.abspath(".")  # Обычный режим (при запуске .py)
+    return os.path.join(base_path, relative_path)
+
+
+def default_data_dir():
+    """Внешний каталог данных: STEEL_DATA_DIR или каталог данных пользователя.
+
+    Справочник из этого каталога имеет приоритет над встроенным в программу
+    и может обновляться во время работы.
+    """
+    path = os.environ.get(DATA_DIR_ENV)
+    if path:
+        return path
+    base = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "SteelCalculator", "data")
+
+
+def active_data_path(data_dir=None):
+    """JSON-справочник из внешнего каталога, если он есть, иначе встроенный"""
+    external = os.path.join(data_dir or default_data_dir(), DATA_FILE_NAME)
+    if os.path.isfile(external):
+        return external
+    return resource_path(DEFAULT_DATA_PATH)
+
+
+class ValidationReport:
+    """Отчет о проверке справочника: отброшенные, исправленные и дополненные марки"""
+
+    def __init__(self):
+        self.rejected = []   # (марка, причина)
+        self.repaired = []   # (марка, описание исправления)
+        self.filled = {}     # марка -> число заполненных пропусков
+
+    def __bool__(self):
+        return bool(self.rejected or self.repaired or self.filled)
+
+    def summary(self):
+        """Текстовое описание для журнала или окна предупреждения"""
+        lines = [f"Отброшено марок: {len(self.rejected)}"]
+        lines += [f"  {grade}: {reason}" for grade, reason in self.rejected]
+        lines.append(f"Исправлено марок: {len(self.repaired)}")
+        lines += [f"  {grade}: {note}" for grade, note in self.repaired]
+        lines.append(f"Заполнено пропусков: {sum(self.filled.values())} у {len(self.filled)} марок")
+        return "\n".join(lines)
+
+
+def _as_number(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else None
+    if isinstance(value, str):
+        try:
+            return float(value.strip().replace(",", "."))
+        except ValueError:
+            return None
+    return None
+
+
+def _merge_split_decimal(values, size):
+    """Исправление значений вида 13,6, которые JSON читает как два числа 13 и 6.
+
+    Возвращает исправленный массив и описание, либо None, если исправление
+    неоднозначно или невозможно.
+    """
+    if len(values) != size + 1:
+        return None
+    candidates = [
+        i for i in range(len(values) - 1)
+        if isinstance(values[i], int) and isinstance(values[i + 1], int)
+        and not isinstance(values[i + 1], bool) and 0 <= values[i + 1] <= 9
+    ]
+    if len(candidates) != 1:
+        return None
+    i = candidates[0]
+    merged = float(f"{values[i]}.{values[i + 1]}")
+    return values[:i] + [merged] + values[i + 2:], f"{values[i]},{values[i + 1]} → {merged}"
+
+
+def _fill_gaps(values, temps, gap_policy):
+    known = [i for i, v in enumerate(values) if v is not None]
+    filled = list(values)
+    for i, value in enumerate(values):
+        if value is not None:
+            continue
+        right = next((k for k in known if k > i), None)
+        left = next((k for k in reversed(known) if k < i), None)
+        if left is None or right is None:
+            filled[i] = values[right if left is None else left]
+        elif gap_policy == GAP_NEAREST:
+            nearest = left if temps[i] - temps[left] <= temps[right] - temps[i] else right
+            filled[i] = values[nearest]
+        else:
+            share = (temps[i] - temps[left]) / (temps[right] - temps[left])
+            filled[i] = values[left] + share * (values[right] - values[left])
+    return filled
+
+
+def validate_steel_data(data, gap_policy=GAP_INTERPOLATE):
+    """Проверка и нормализация справочника.
+
+    Возвращает (данные, отчет). В данных температуры отсортированы, у каждой
+    марки ровно по одному значению α на температуру и нет пропусков.
+    """
+    if gap_policy not in (GAP_INTERPOLATE, GAP_NEAREST):
+        raise ValueError(f"Неизвестное правило заполнения пропусков: {gap_policy}")
+    if not isinstance(data, dict) or "temperature_values" not in data or "steel_grades" not in data:
+        raise ValueError("Некорректный формат JSON")
+    if not isinstance(data["temperature_values"], list):
+        raise ValueError("temperature_values должен быть списком")
+    if not isinstance(data["steel_grades"], list):
+        raise ValueError("steel_grades должен быть списком")
+
+    temps = []
+    for position, temp in enumerate(data["temperature_values"], 1):
+        # Дробная температура не округляется: она сдвинула бы столбец таблицы
+        value = _as_number(temp)
+        if value is None or not value.is_integer():
+            raise ValueError(f"temperature_values[{position}]: ожидается целое число °C, "
+                             f"получено {temp!r}")
+        temps.append(int(value))
+    if len(set(temps)) != len(temps):
+        raise ValueError("Повторяющиеся значения в temperature_values")
+    order = sorted(range(len(temps)), key=temps.__getitem__)
+    sorted_temps = [temps[i] for i in order]
+
+    report = ValidationReport()
+    grades = []
+    seen = set()
+    for position, grade in enumerate(data["steel_grades"]):
+        name = grade.get("steel_grade") if isinstance(grade, dict) else None
+        label = name if isinstance(name, str) and name.strip() else f"#{position + 1}"
+        alphas = grade.get("alpha") if isinstance(grade, dict) else None
+
+        if label != name:
+            report.rejected.append((label, "нет названия марки"))
+            continue
+        if name in seen:
+            report.rejected.append((name, "повторяющееся название марки"))
+            continue
+        if not isinstance(alphas, list):
+            report.rejected.append((name, "нет массива alpha"))
+            continue
+
+        if len(alphas) != len(temps):
+            repaired = _merge_split_decimal(alphas, len(temps))
+            if repaired is None:
+                report.rejected.append(
+                    (name, f"значений α: {len(alphas)}, температур: {len(temps)}"))
+                continue
+            alphas, note = repaired
+            report.repaired.append((name, note))
+
+        values = [_as_number(alphas[i]) for i in order]
+        gaps = sum(v is None for v in values)
+        if gaps == len(values):
+            report.rejected.append((name, "нет ни одного значения α"))
+            continue
+        if gaps:
+            values = _fill_gaps(values, sorted_temps, gap_policy)
+            report.filled[name] = gaps
+
+        seen.add(name)
+        grades.append({"steel_grade": name, "alpha": values})
+
+    return {"temperature_values": sorted_temps, "steel_grades": grades}, report
+
+
+def read_steel_json(path=None):
+    """Чтение JSON-справочника без проверки"""
+    json_path = path or resource_path(DEFAULT_DATA_PATH)
+    with open(json_path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def load_steel_data(path=None, gap_policy=GAP_INTERPOLATE):
+    """Загрузка и нормализация справочника сталей; возвращает (данные, отчет)"""
+    return validate_steel_data(read_steel_json(path), gap_policy)
+
+
+def compiled_path(json_path):
+    """Путь к двоичному файлу, соответствующему JSON-справочнику"""
+    return os.path.splitext(json_path)[0] + ".bin"
+
+
+def _file_digest(path):
+    with open(path, "rb") as file:
+        return hashlib.blake2b(file.read(), digest_size=16).digest()
+
+
+def source_stamp(json_path):
+    """Отметка исходного JSON: (mtime_ns, размер, хэш содержимого)"""
+    stat = os.stat(json_path)
+    return stat.st_mtime_ns, stat.st_size, _file_digest(json_path)
+
+
+def pack_steel_data(data, stamp=(0, 0, b"")):
+    """Упаковка нормализованного справочника (validate_steel_data) в двоичный формат"""
+    if sys.byteorder != "little":
+        raise OSError("Двоичный справочник поддерживается только на little-endian платформах")
+    temps = data["temperature_values"]
+    grades = data["steel_grades"]
+
+    alphas = array("d")
+    for grade in grades:
+        alphas.extend(grade["alpha"])
+
+    names = [grade["steel_grade"].encode("utf-8") for grade in grades]
+    offsets = array("I", [0])
+    for name in names:
+        offsets.append(offsets[-1] + len(name))
+
+    mtime_ns, size, digest = stamp
+    parts = [
+        HEADER.pack(MAGIC, FORMAT_VERSION, len(grades), len(temps), mtime_ns, size, digest),
+        array("d", temps).tobytes(),
+        alphas.tobytes(),
+        offsets.tobytes(),
+        b"".join(names),
+    ]
+    return b"".join(parts)
+
+
+class SteelCatalog:
+    """Скомпилированный справочник поверх буфера (bytes или mmap)"""
+
+    def __init__(self, buffer):
+        if len(buffer) < HEADER.size:
+            raise ValueError("Поврежденный двоичный справочник")
+        magic, version, n_grades, n_temps, mtime_ns, size, digest = HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Неизвестный формат двоичного справочника")
+
+        self.buffer = buffer
+        self.source_stamp = (mtime_ns, size, digest)
+        # Отчет проверки есть только у справочника, собранного из JSON в этом процессе
+        self.report = None
+
+        offset = HEADER.size
+        self.temperatures = list(struct.unpack_from(f"<{n_temps}d", buffer, offset))
+        offset += 8 * n_temps
+
+        self._alpha_offset = offset
+        self._alpha_count = n_grades * n_temps
+        offset += 8 * self._alpha_count
+
+        name_offsets = array("I")
+        name_offsets.frombytes(buffer[offset:offset + 4 * (n_grades + 1)])
+        offset += 4 * (n_grades + 1)
+        names = bytes(buffer[offset:offset + name_offsets[-1]])
+        self.grades = [names[a:b].decode("utf-8") for a, b in zip(name_offsets, name_offsets[1:])]
+
+    @classmethod
+    def from_file(cls, path):
+        """Отображение двоичного справочника в память"""
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer)
+
+    def alpha_matrix(self):
+        """Матрица α (марки × температуры) без копирования данных"""
+        import numpy as np
+
+        matrix = np.frombuffer(self.buffer, dtype="<f8", count=self._alpha_count,
+                               offset=self._alpha_offset)
+        return matrix.reshape(len(self.grades), len(self.temperatures))
+
+    def close(self):
+        """Освобождение отображения файла в память.
+
+        Пока на буфер ссылаются массивы NumPy (построенная таблица α),
+        отображение остается открытым и освободится вместе с ними.
+        """
+        if isinstance(self.buffer, mmap.mmap):
+            try:
+                self.buffer.close()
+            except BufferError:
+                pass
+
+    def is_fresh(self, json_path):
+        """Соответствует ли справочник текущему содержимому JSON"""
+        if not os.path.exists(json_path):
+            return True
+        mtime_ns, size, digest = self.source_stamp
+        stat = os.stat(json_path)
+        if (stat.st_mtime_ns, stat.st_size) == (mtime_ns, size):
+            return True
+        # После распаковки (PyInstaller, git checkout) меняется только время файла
+        return stat.st_size == size and _file_digest(json_path) == digest
+
+
+def compile_steel_data(json_path=None, out_path=None, gap_policy=GAP_INTERPOLATE):
+    """Компиляция JSON-справочника в двоичный файл; возвращает (путь, отчет)"""
+    json_path = json_path or resource_path(DEFAULT_DATA_PATH)
+    out_path = out_path or compiled_path(json_path)
+    data, report = load_steel_data(json_path, gap_policy)
+    blob = pack_steel_data(data, source_stamp(json_path))
+
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(blob)
+    os.replace(tmp_path, out_path)
+    return out_path, report
+
+
+def open_steel_catalog(json_path=None, gap_policy=GAP_INTERPOLATE):
+    """Справочник для расчетов: двоичный файл, если он актуален, иначе JSON.
+
+    При чтении из JSON двоичный файл пересобирается (если каталог доступен
+    для записи), чтобы следующий запуск был быстрым.
+    """
+    json_path = json_path or resource_path(DEFAULT_DATA_PATH)
+    bin_path = compiled_path(json_path)
+
+    if os.path.exists(bin_path):
+        try:
+            catalog = SteelCatalog.from_file(bin_path)
+            if catalog.is_fresh(json_path):
+                return catalog
+            # Устаревший файл нужно закрыть, иначе Windows не даст его заменить
+            catalog.close()
+        except (OSError, ValueError):
+            pass
+
+    try:
+        _, report = compile_steel_data(json_path, bin_path, gap_policy)
+        catalog = SteelCatalog.from_file(bin_path)
+    except OSError:
+        stamp = source_stamp(json_path)
+        data, report = load_steel_data(json_path, gap_policy)
+        catalog = SteelCatalog(pack_steel_data(data, stamp))
+    catalog.report = report
+    return catalog
+
+
+def _is_fresh_compiled(json_path, bin_path):
+    if not os.path.exists(bin_path):
+        return False
+    try:
+        catalog = SteelCatalog.from_file(bin_path)
+        fresh = catalog.is_fresh(json_path)
+        catalog.close()
+        return fresh
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_compiled(json_path=None, gap_policy=GAP_INTERPOLATE):
+    """Путь к актуальному двоичному справочнику, при необходимости компилирует его.
+
+    Если каталог данных недоступен для записи (например, только для чтения),
+    файл создается во временной папке под именем по хэшу содержимого JSON,
+    так что повторные запуски используют один и тот же файл.
+    """
+    json_path = json_path or resource_path(DEFAULT_DATA_PATH)
+    bin_path = compiled_path(json_path)
+    if _is_fresh_compiled(json_path, bin_path):
+        return bin_path
+
+    try:
+        return compile_steel_data(json_path, bin_path, gap_policy)[0]
+    except OSError:
+        digest = _file_digest(json_path).hex()
+        tmp_path = os.path.join(tempfile.gettempdir(), f"steel_data_{digest}_{gap_policy}.bin")
+        if _is_fresh_compiled(json_path, tmp_path):
+            return tmp_path
+        return compile_steel_data(json_path, tmp_path, gap_policy)[0]
+
+
+def empty_catalog():
+    """Пустой справочник (используется, если данные не удалось загрузить)"""
+    return SteelCatalog(pack_steel_data({"temperature_values": [], "steel_grades": []}))
@@ -0,0 +1,203 @@
+"""Пакетный расчёт усадки и длины порезки без графического интерфейса.
+
+Все функции принимают целые массивы (списки, NumPy, столбцы таблиц) и
+считают результат за один векторный проход. Ошибки не показываются в
+диалогах, а возвращаются построчно в виде кодов.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from steel_models import DEFAULT_MODEL, T_REF, make_model
+
+
+# Коды ошибок для каждой строки расчета
+OK = 0
+ERR_UNKNOWN_GRADE = 1
+ERR_NO_ALPHA = 2
+ERR_INVALID_INPUT = 3
+
+ERROR_MESSAGES = {
+    OK: "",
+    ERR_UNKNOWN_GRADE: "Марка стали не найдена",
+    ERR_NO_ALPHA: "Отсутствуют данные коэффициентов расширения",
+    ERR_INVALID_INPUT: "Некорректные входные данные",
+}
+
+# Размер кэша α для пар (марка, температура порезки)
+ALPHA_CACHE_SIZE = 4096
+
+BatchResult = namedtuple("BatchResult", ["alpha", "shrinkage", "cut_length", "errors"])
+# Результат обратного расчета: length - длина в холодном состоянии
+InverseResult = namedtuple("InverseResult", ["alpha", "shrinkage", "length", "errors"])
+
+
+class AlphaTable:
+    """Скомпилированная таблица коэффициентов α: строка - марка, столбец - температура.
+
+    Строится один раз при загрузке данных. Коэффициенты модели расширения
+    (steel_models) для всех марок и интервалов температур считаются заранее,
+    поэтому поиск α сводится к словарю марок, бинарному поиску интервала и
+    вычислению многочлена.
+
+    Повторные запросы одной и той же пары (марка, температура) обслуживаются
+    LRU-кэшем cached_alpha. Кэш принадлежит таблице, поэтому при перезагрузке
+    справочника (новой таблице) он автоматически начинается с нуля.
+    """
+
+    def __init__(self, data, cache_size=ALPHA_CACHE_SIZE, model=DEFAULT_MODEL):
+        temps = [int(temp) for temp in data["temperature_values"]]
+        grades = [grade["steel_grade"] for grade in data["steel_grades"]]
+
+        # Пропуски (null) и недостающие значения хранятся как NaN
+        alphas = np.full((len(grades), len(temps)), np.nan)
+        for row, grade in enumerate(data["steel_grades"]):
+            values = [np.nan if v is None else float(v) for v in grade["alpha"][:len(temps)]]
+            alphas[row, :len(values)] = values
+
+        order = np.argsort(temps, kind="stable")
+        self._setup(np.asarray(temps, dtype=np.float64)[order], grades, alphas[:, order],
+                    cache_size, model)
+
+    @classmethod
+    def from_arrays(cls, temperatures, grades, alphas, cache_size=ALPHA_CACHE_SIZE,
+                    model=DEFAULT_MODEL):
+        """Таблица из готовых массивов (температуры уже отсортированы по возрастанию)"""
+        table = cls.__new__(cls)
+        table._setup(np.asarray(temperatures, dtype=np.float64), list(grades),
+                     np.asarray(alphas, dtype=np.float64), cache_size, model)
+        return table
+
+    @classmethod
+    def from_catalog(cls, catalog, cache_size=ALPHA_CACHE_SIZE, model=DEFAULT_MODEL):
+        """Таблица поверх скомпилированного справочника steel_data.SteelCatalog"""
+        return cls.from_arrays(catalog.temperatures, catalog.grades, catalog.alpha_matrix(),
+                               cache_size, model)
+
+    def _setup(self, temperatures, grades, alphas, cache_size, model):
+        self.temperatures = temperatures
+        self.grades = grades
+        self.index = {name: row for row, name in enumerate(grades)}
+        self.alphas = alphas.reshape(len(grades), len(temperatures))
+        self.model = make_model(model, self.temperatures, self.alphas)
+        self._cached_alpha = lru_cache(maxsize=cache_size)(self.alpha_at)
+
+    def cached_alpha(self, grade, cut_temp, env_temp=None):
+        """alpha_at через LRU-кэш"""
+        # Для моделей без учета температуры среды она не входит в ключ кэша
+        if not self.model.uses_env:
+            env_temp = None
+        return self._cached_alpha(grade, cut_temp, env_temp)
+
+    def cache_stats(self):
+        """Статистика кэша α: попадания, промахи, текущий и максимальный размер"""
+        info = self._cached_alpha.cache_info()
+        return {"hits": info.hits, "misses": info.misses,
+                "size": info.currsize, "maxsize": info.maxsize}
+
+    def clear_cache(self):
+        """Сброс кэша α"""
+        self._cached_alpha.cache_clear()
+
+    def __len__(self):
+        return len(self.grades)
+
+    def __contains__(self, grade):
+        return grade in self.index
+
+    def grade_rows(self, grades):
+        """Номера строк таблицы для массива марок (-1 для неизвестных)"""
+        get = self.index.get
+        return np.fromiter((get(g, -1) for g in grades), dtype=np.intp, count=len(grades))
+
+    def alpha_at(self, grade, cut_temp, env_temp=None):
+        """Коэффициент α одной марки (NaN при пропуске в данных).
+
+        Температура среды нужна только моделям, которые её учитывают;
+        без неё интервал отсчитывается от steel_models.T_REF.
+        """
+        return self.model.alpha_at(self.index[grade], env_temp, cut_temp)
+
+    def interpolate(self, rows, cut_temps, env_temps=None):
+        """α для массивов строк и температур порезки (и среды)"""
+        if env_temps is None:
+            env_temps = np.full(np.shape(cut_temps), T_REF)
+        return self.model.alpha(rows, env_temps, cut_temps)
+
+
+def _alpha_and_errors(table, grades, env, cut, lengths):
+    rows = table.grade_rows(grades)
+    known = rows >= 0
+    alpha = np.full(len(grades), np.nan)
+    alpha[known] = table.interpolate(rows[known], np.nan_to_num(cut[known]),
+                                     np.nan_to_num(env[known]))
+
+    errors = np.zeros(len(grades), dtype=np.int8)
+    errors[~(np.isfinite(env) & np.isfinite(cut) & np.isfinite(lengths))] = ERR_INVALID_INPUT
+    errors[known & np.isnan(alpha)] = ERR_NO_ALPHA
+    errors[~known] = ERR_UNKNOWN_GRADE
+    return alpha, errors
+
+
+def _as_columns(grades, env_temps, cut_temps, lengths):
+    grades = list(grades)
+    env = np.asarray(env_temps, dtype=np.float64)
+    cut = np.asarray(cut_temps, dtype=np.float64)
+    length = np.asarray(lengths, dtype=np.float64)
+    if not (len(grades) == len(env) == len(cut) == len(length)):
+        raise ValueError("Столбцы входных данных имеют разную длину")
+    return grades, env, cut, length
+
+
+def compute_batch(table, grades, env_temps, cut_temps, lengths):
+    """Расчет усадки и длины порезки для всех строк за один проход"""
+    grades, env, cut, length = _as_columns(grades, env_temps, cut_temps, lengths)
+    alpha, errors = _alpha_and_errors(table, grades, env, cut, length)
+
+    shrinkage = alpha * 1e-6 * (cut - env) * length
+    cut_length = length + shrinkage
+
+    failed = errors != OK
+    alpha[failed] = np.nan
+    shrinkage[failed] = np.nan
+    cut_length[failed] = np.nan
+    return BatchResult(alpha, shrinkage, cut_length, errors)
+
+
+def solve_lengths(table, grades, env_temps, cut_temps, cut_lengths):
+    """Обратный расчет: длина в холодном состоянии по длине порезки (горячей).
+
+    Ни одна модель расширения не зависит от длины, поэтому обращение
+    L_гор = L_хол · (1 + α·ΔT) выполняется в замкнутом виде, без итераций.
+    """
+    grades, env, cut, hot = _as_columns(grades, env_temps, cut_temps, cut_lengths)
+    alpha, errors = _alpha_and_errors(table, grades, env, cut, hot)
+
+    factor = 1.0 + alpha * 1e-6 * (cut - env)
+    errors[(errors == OK) & ~(factor > 0)] = ERR_INVALID_INPUT
+    with np.errstate(divide="ignore", invalid="ignore"):
+        length = hot / factor
+    shrinkage = hot - length
+
+    failed = errors != OK
+    alpha[failed] = np.nan
+    shrinkage[failed] = np.nan
+    length[failed] = np.nan
+    return InverseResult(alpha, shrinkage, length, errors)
+
+
+def compute_columns(table, columns):
+    """Расчет по столбцам: словарь или DataFrame с полями grade, env_temp, cut_temp, length"""
+    return compute_batch(
+        table,
+        columns["grade"],
+        columns["env_temp"],
+        columns["cut_temp"],
+        columns["length"],
+    )
+
+
+def error_message(code):
+    """Текст ошибки по её коду"""
+    return ERROR_MESSAGES.get(int(code), "Неизвестная ошибка")
@@ -0,0 +1,237 @@
+"""Экспорт данных сессии в файлы: Excel, CSV, Parquet и Arrow.
+
+Excel пишется потоково собственным минимальным XML-писателем, CSV - модулем csv,
+Parquet и Arrow - через pyarrow (необязательная зависимость; без него эти
+форматы не предлагаются в FILE_TYPES). Запись идет
+во временный файл, который переименовывается только после успешного
+завершения, поэтому отмененный или прерванный экспорт не оставляет
+недописанных файлов.
+
+ExportJob выполняет экспорт в фоновом потоке. Интерфейс опрашивает его
+состояние (progress, done, error) через root.after и не вызывает Tk из
+рабочего потока.
+"""
+import csv
+import importlib.util
+import io
+import math
+import os
+import threading
+import zipfile
+
+from steel_metrics import count, timer
+from steel_session import EXPORT_COLUMNS
+
+
+# Через сколько строк обновляется прогресс и проверяется отмена
+PROGRESS_STEP = 5000
+
+# Форматы диалога сохранения; Parquet и Arrow - только при установленном pyarrow
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+FILE_TYPES = [
+    ("Excel Files", "*.xlsx"),
+    ("CSV Files", "*.csv"),
+] + ([
+    ("Parquet Files", "*.parquet"),
+    ("Arrow Files", "*.arrow"),
+] if HAS_PYARROW else [])
+
+
+def _escape(text):
+    """Экранирование текста для XML (xml.sax.saxutils тянет при импорте urllib и email)"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class ExportCancelled(Exception):
+    """Экспорт отменен пользователем"""
+
+
+def _rows(columns):
+    keys = list(EXPORT_COLUMNS)
+    return zip(*(columns[key] for key in keys))
+
+
+def _write_rows(append, columns, total, progress, cancel):
+    for done, row in enumerate(_rows(columns), 1):
+        append(row)
+        if done % PROGRESS_STEP == 0:
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            if progress:
+                progress(done, total)
+
+
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Сессия" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            cells.append("<c/>")
+        elif isinstance(value, (int, float)):
+            cells.append(f"<c><v>{value!r}</v></c>")
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{_escape(str(value))}</t></is></c>')
+    return "<row>" + "".join(cells) + "</row>"
+
+
+def write_xlsx(columns, path, progress=None, cancel=None):
+    """Потоковая запись в Excel.
+
+    Лист формируется напрямую в XML (строки без общей таблицы строк и
+    стилей) и сразу сжимается в архив, без построения объектной модели книги.
+    """
+    total = len(columns["grade"])
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        with archive.open("xl/worksheets/sheet1.xml", "w") as raw:
+            sheet = io.TextIOWrapper(raw, encoding="utf-8")
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_COLUMNS.values()))
+            _write_rows(lambda row: sheet.write(_xlsx_row(row)), columns, total, progress, cancel)
+            sheet.write("</sheetData></worksheet>")
+            sheet.flush()
+            sheet.detach()
+
+
+def write_csv(columns, path, progress=None, cancel=None):
+    """Запись в CSV (разделитель ';', кодировка UTF-8 с BOM для Excel)"""
+    total = len(columns["grade"])
+    with open(path, "w", encoding="utf-8-sig", newline="") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(EXPORT_COLUMNS.values())
+        _write_rows(writer.writerow, columns, total, progress, cancel)
+
+
+def _arrow_table(columns):
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("Для экспорта в Parquet/Arrow требуется пакет pyarrow")
+    types = {"grade": pa.string(), "krata_step": pa.int32(), "krata_count": pa.int32()}
+    return pa.table({
+        title: pa.array(columns[key], type=types.get(key, pa.float64()))
+        for key, title in EXPORT_COLUMNS.items()
+    })
+
+
+def write_parquet(columns, path, progress=None, cancel=None):
+    """Запись в Parquet (столбцы с числовыми типами)"""
+    import pyarrow.parquet as pq
+
+    table = _arrow_table(columns)
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+    pq.write_table(table, path)
+
+
+def write_arrow(columns, path, progress=None, cancel=None):
+    """Запись в формате Arrow IPC (Feather v2)"""
+    import pyarrow.feather as feather
+
+    table = _arrow_table(columns)
+    if cancel is not None and cancel.is_set():
+        raise ExportCancelled()
+    feather.write_feather(table, path)
+
+
+WRITERS = {
+    ".xlsx": write_xlsx,
+    ".csv": write_csv,
+    ".parquet": write_parquet,
+    ".arrow": write_arrow,
+    ".feather": write_arrow,
+}
+
+
+def export_columns(columns, path, progress=None, cancel=None):
+    """Экспорт столбцов сессии в файл; формат определяется по расширению"""
+    writer = WRITERS.get(os.path.splitext(path)[1].lower())
+    if writer is None:
+        raise ValueError(f"Неподдерживаемый формат файла: {os.path.splitext(path)[1]}")
+
+    # Расширение временного файла сохраняется, чтобы оно совпадало с форматом
+    base, ext = os.path.splitext(path)
+    tmp_path = f"{base}.partial{ext}"
+    try:
+        writer(columns, tmp_path, progress, cancel)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    if progress:
+        total = len(columns["grade"])
+        progress(total, total)
+
+
+class ExportJob:
+    """Экспорт в фоновом потоке с прогрессом и отменой"""
+
+    def __init__(self, columns, path):
+        self.columns = columns
+        self.path = path
+        self.total = len(columns["grade"])
+        self.progress = 0
+        self.error = None
+        self.cancelled = False
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Запрос отмены; поток завершится при следующей проверке"""
+        self._cancel.set()
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def _set_progress(self, done, total):
+        self.progress = done
+
+    def _run(self):
+        try:
+            with timer("export"):
+                export_columns(self.columns, self.path, self._set_progress, self._cancel)
+            count("export.rows", self.total)
+        except ExportCancelled:
+            self.cancelled = True
+        except Exception as e:
+            self.error = e
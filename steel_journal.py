@@ -0,0 +1,300 @@
+"""Журнал сессий на диске (SQLite в режиме WAL).
+
+Каждая добавленная в сессию запись дописывается в журнал, поэтому после
+сбоя программы или перезагрузки компьютера текущая сессия восстанавливается
+при следующем запуске. Очистка сессии не стирает историю, а начинает новую
+сессию; удаление записи лишь помечает её.
+
+Изменения накапливаются в памяти и записываются одной транзакцией
+(flush): при добавлении JOURNAL_BATCH записей, по таймеру интерфейса и при
+закрытии. Каждая транзакция завершается fsync (synchronous=FULL), так что
+подтвержденные записи переживают и отключение питания, а число fsync не
+растет с числом записей. Изменения остаются в памяти, пока транзакция не
+зафиксирована: если журнал занят другим экземпляром программы, запись
+повторяется позже с нарастающей паузой.
+
+Журнал могут одновременно открыть несколько экземпляров программы. Номера
+записей выдает SQLite, а сессия закрепляется за процессом файловой
+блокировкой (SESSION_LOCK_SUFFIX), которую ОС снимает и при аварийном
+завершении. Новый экземпляр продолжает последнюю сессию, если она никем не
+занята, иначе начинает свою.
+
+Записи индексированы по сессии, марке и времени, что позволяет быстро
+восстанавливать последнюю сессию и строить отчеты за период по месяцам
+накопленной истории (query).
+"""
+import itertools
+import os
+import sqlite3
+import time
+
+from steel_session import NUMERIC_FIELDS, SessionRecord
+
+
+# Число накопленных изменений, при котором журнал записывается сразу
+JOURNAL_BATCH = 100
+# Ожидание блокировки базы другим экземпляром внутри SQLite (с)
+JOURNAL_BUSY_TIMEOUT_S = 0.5
+# Пауза перед повтором неудачной записи (с); удваивается до максимума
+FLUSH_RETRY_S = 0.25
+FLUSH_RETRY_MAX_S = 8.0
+# Число попыток записи при закрытии журнала
+CLOSE_ATTEMPTS = 3
+# Суффикс файла блокировки сессии: <журнал>.session-<номер>.lock
+SESSION_LOCK_SUFFIX = ".session-{}.lock"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    id INTEGER PRIMARY KEY,
+    session INTEGER NOT NULL,
+    created REAL NOT NULL,
+    grade TEXT NOT NULL,
+    env_temp REAL NOT NULL,
+    cut_temp REAL NOT NULL,
+    alpha REAL NOT NULL,
+    length REAL NOT NULL,
+    shrinkage REAL NOT NULL,
+    cut_length REAL NOT NULL,
+    krata_step INTEGER NOT NULL,
+    krata_count INTEGER NOT NULL,
+    deleted INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS records_session ON records (session, deleted);
+CREATE INDEX IF NOT EXISTS records_grade ON records (grade, created);
+CREATE INDEX IF NOT EXISTS records_created ON records (created);
+"""
+
+_RECORD_FIELDS = ("grade",) + NUMERIC_FIELDS + ("krata_step", "krata_count")
+_INSERT = (
+    f"INSERT INTO records (session, created, {', '.join(_RECORD_FIELDS)}) "
+    f"VALUES ({', '.join('?' * (len(_RECORD_FIELDS) + 2))})"
+)
+_DELETE = "UPDATE records SET deleted = 1 WHERE id = ?"
+
+
+def default_journal_path():
+    """Путь журнала в пользовательском каталоге данных"""
+    base = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return os.path.join(base, "SteelCalculator", "session_journal.sqlite3")
+
+
+def _lock_file(path):
+    """Неблокирующая исключительная блокировка файла; None, если он занят"""
+    file = open(path, "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        file.close()
+        return None
+    return file
+
+
+class SessionJournal:
+    """Журнал записей сессий.
+
+    append возвращает ключ записи сразу, до записи на диск, чтобы по нему
+    можно было пометить удаление еще не записанной записи. Номер строки в
+    базе сопоставляется ключу после фиксации транзакции.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_journal_path()
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(self.path, timeout=JOURNAL_BUSY_TIMEOUT_S,
+                                   isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.executescript(_SCHEMA)
+        # Изменения до фиксации: (ключ, значения INSERT или None для удаления)
+        self._pending = []
+        self._keys = itertools.count(1)
+        self._rowids = {}
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self._session_lock = None
+
+        row = self._db.execute("SELECT MAX(id) FROM sessions").fetchone()
+        if row[0] is None or not self._lock_session(row[0]):
+            self._start_session()
+
+    def _lock_session(self, session_id):
+        lock = _lock_file(self.path + SESSION_LOCK_SUFFIX.format(session_id))
+        if lock is None:
+            return False
+        self._switch_session(session_id, lock)
+        return True
+
+    def _switch_session(self, session_id, lock):
+        self._release_session()
+        self._session_lock = lock
+        self.session_id = session_id
+
+    def _release_session(self):
+        if self._session_lock is None:
+            return
+        self._session_lock.close()
+        self._session_lock = None
+        try:
+            os.remove(self.path + SESSION_LOCK_SUFFIX.format(self.session_id))
+        except OSError:
+            pass
+
+    def _start_session(self):
+        """Создание и блокировка новой сессии.
+
+        Сессия блокируется до фиксации, чтобы другой экземпляр не занял ее;
+        текущая сессия меняется только после успешной фиксации, поэтому при
+        ошибке (база занята, файл блокировки недоступен) она остается прежней.
+        """
+        lock = None
+        try:
+            with self._db:
+                self._db.execute("BEGIN IMMEDIATE")
+                cursor = self._db.execute("INSERT INTO sessions (started) VALUES (?)",
+                                          (time.time(),))
+                session_id = cursor.lastrowid
+                lock = _lock_file(self.path + SESSION_LOCK_SUFFIX.format(session_id))
+                if lock is None:
+                    raise OSError(f"Не удалось заблокировать сессию {session_id}")
+        except BaseException:
+            if lock is not None:
+                lock.close()
+            raise
+        self._switch_session(session_id, lock)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Запись ---
+
+    def append(self, record):
+        """Добавление записи в текущую сессию; возвращает ключ записи журнала"""
+        key = next(self._keys)
+        values = (self.session_id, time.time()) + tuple(
+            getattr(record, name) for name in _RECORD_FIELDS)
+        self._pending.append((key, values))
+        if len(self._pending) >= JOURNAL_BATCH:
+            self.flush()
+        return key
+
+    def remove(self, keys):
+        """Пометка записей как удаленных"""
+        for key in keys:
+            self._pending.append((key, None))
+        if len(self._pending) >= JOURNAL_BATCH:
+            self.flush()
+
+    def new_session(self):
+        """Завершение текущей сессии (история сохраняется) и начало новой.
+
+        При sqlite3.Error или OSError текущая сессия остается прежней.
+        """
+        self.flush()
+        self._start_session()
+
+    def flush(self):
+        """Запись накопленных изменений одной транзакцией.
+
+        Возвращает False, если база занята или недоступна: изменения
+        остаются в памяти, и следующая попытка делается не раньше паузы
+        повтора. Прочие ошибки SQLite передаются вызывающему.
+        """
+        if not self._pending:
+            return True
+        now = time.monotonic()
+        if now < self._retry_at:
+            return False
+        try:
+            rowids = self._write(self._pending)
+        except sqlite3.OperationalError:
+            self._retry_delay = min(max(2 * self._retry_delay, FLUSH_RETRY_S), FLUSH_RETRY_MAX_S)
+            self._retry_at = now + self._retry_delay
+            return False
+        self._rowids.update(rowids)
+        self._pending = []
+        self._retry_delay = self._retry_at = 0.0
+        return True
+
+    def _write(self, pending):
+        """Транзакция с изменениями; возвращает номера строк новых записей"""
+        rowids = {}
+        with self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            for key, values in pending:
+                if values is not None:
+                    rowids[key] = self._db.execute(_INSERT, values).lastrowid
+                else:
+                    rowid = rowids.get(key) or self._rowids.get(key)
+                    if rowid is not None:
+                        self._db.execute(_DELETE, (rowid,))
+        return rowids
+
+    def close(self):
+        """Запись изменений (с повторами, если база занята) и закрытие"""
+        try:
+            for attempt in range(CLOSE_ATTEMPTS):
+                if attempt:
+                    time.sleep(self._retry_delay)
+                self._retry_at = 0.0
+                if self.flush():
+                    break
+            else:
+                raise sqlite3.OperationalError(
+                    f"Журнал занят, не записано изменений: {len(self._pending)}")
+        finally:
+            self._release_session()
+            self._db.close()
+
+    # --- Чтение ---
+
+    def restore(self):
+        """Записи текущей сессии: список (ключ журнала, SessionRecord)"""
+        self.flush()
+        cursor = self._db.execute(
+            f"SELECT id, {', '.join(_RECORD_FIELDS)} FROM records "
+            "WHERE session = ? AND deleted = 0 ORDER BY id", (self.session_id,))
+        restored = []
+        for row in cursor:
+            key = next(self._keys)
+            self._rowids[key] = row[0]
+            restored.append((key, SessionRecord(*row[1:])))
+        return restored
+
+    def query(self, grade=None, since=None, until=None, include_deleted=False):
+        """Записи всех сессий по марке и/или периоду (время - секунды эпохи).
+
+        Возвращает список (время добавления, SessionRecord) по возрастанию времени.
+        """
+        self.flush()
+        conditions, params = [], []
+        if grade is not None:
+            conditions.append("grade = ?")
+            params.append(grade)
+        if since is not None:
+            conditions.append("created >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("created < ?")
+            params.append(until)
+        if not include_deleted:
+            conditions.append("deleted = 0")
+        where = " AND ".join(conditions) or "1"
+        cursor = self._db.execute(
+            f"SELECT created, {', '.join(_RECORD_FIELDS)} FROM records "
+            f"WHERE {where} ORDER BY created", params)
+        return [(row[0], SessionRecord(*row[1:])) for row in cursor]
@@ -0,0 +1,130 @@
+"""Счетчики и таймеры для диагностики производительности.
+
+Участки кода замеряются через timed (контекстный менеджер и декоратор),
+события считаются через count. Сводка (число вызовов, суммарное, среднее,
+максимальное и последнее время) доступна через snapshot и отображается в
+окне диагностики интерфейса (F12).
+
+Если задан журнал (open_log), каждое событие дописывается в него строкой
+JSON: {"ts", "name", "ms"} для таймеров и {"ts", "name", "count"} для
+счетчиков. Такой файл можно собрать с медленного рабочего места и
+разобрать без запуска программы.
+
+Запись безопасна из нескольких потоков (компиляция таблицы и экспорт
+выполняются в фоне).
+"""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Metrics:
+    """Реестр таймеров и счетчиков"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timers = {}
+        self._counters = {}
+        self._log = None
+
+    def open_log(self, path):
+        """Дописывать события в файл path (JSON по строке на событие)"""
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+            self._log = open(path, "a", encoding="utf-8", buffering=1)
+
+    def close_log(self):
+        with self._lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def _write(self, event):
+        if self._log is not None:
+            event["ts"] = round(time.time(), 3)
+            self._log.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def add_time(self, name, seconds):
+        """Учет одного замера длительностью seconds"""
+        with self._lock:
+            stat = self._timers.get(name)
+            if stat is None:
+                stat = self._timers[name] = [0, 0.0, 0.0, 0.0]
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+            stat[3] = seconds
+            self._write({"name": name, "ms": round(seconds * 1e3, 3)})
+
+    def count(self, name, value=1):
+        """Увеличение счетчика"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            self._write({"name": name, "count": value})
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+    def timed(self, name):
+        """Декоратор замера времени функции"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """Сводка: {"timers": {имя: {...}}, "counters": {имя: значение}}"""
+        with self._lock:
+            timers = {
+                name: {"count": n, "total_ms": total * 1e3, "mean_ms": total / n * 1e3,
+                       "max_ms": worst * 1e3, "last_ms": last * 1e3}
+                for name, (n, total, worst, last) in self._timers.items()
+            }
+            return {"timers": timers, "counters": dict(self._counters)}
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+    def dump(self, path):
+        """Сохранение сводки в JSON-файл"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.snapshot(), file, ensure_ascii=False, indent=1)
+
+
+# Общий реестр программы
+METRICS = Metrics()
+timer = METRICS.timer
+timed = METRICS.timed
+count = METRICS.count
+
+
+def run_profiled(func, path):
+    """Выполнение func под cProfile; статистика сохраняется в path (pstats).
+
+    Первые строки отчета (по суммарному времени) печатаются в stderr.
+    """
+    import cProfile
+    import pstats
+    import sys
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        profiler.dump_stats(path)
+        stats = pstats.Stats(profiler, stream=sys.stderr)
+        stats.sort_stats("cumulative").print_stats(30)
+        print(f"Профиль сохранен: {path}", file=sys.stderr)
@@ -0,0 +1,189 @@
+"""Модели коэффициента линейного расширения по табличным значениям.
+
+В справочнике для каждой марки задан средний коэффициент α_m(T) в
+интервале от T_REF до T с шагом таблицы (обычно 100 °C). Модель по этим
+точкам дает α для пары температур (среды, порезки):
+
+    linear    кусочно-линейная интерполяция α_m по температуре порезки
+              (прежний расчет, используется по умолчанию)
+    spline    монотонный кубический сплайн (PCHIP, Фритч - Карлсон) для
+              α_m: гладкая кривая без выбросов между узлами таблицы
+    integral  α, осредненный по фактическому интервалу [среда, порезка]:
+              деформация ε(T) = α_m(T)·(T - T_REF) по сплайну, α =
+              (ε(порезка) - ε(среда)) / (порезка - среда). Учитывает
+              температуру среды, которую остальные модели не используют.
+
+Все модели - кусочные многочлены третьей степени от dt = T - T[j].
+Коэффициенты считаются один раз для всех марок при построении таблицы,
+поэтому вычисление - это поиск интервала и схема Горнера, в том числе
+векторно для целых графиков. За пределами таблицы берутся крайние
+значения α_m.
+"""
+from bisect import bisect_left
+
+import numpy as np
+
+
+# Температура, от которой отсчитываются средние коэффициенты справочника (°C)
+T_REF = 20.0
+
+
+class PiecewiseModel:
+    """Кусочно-полиномиальная модель α_m(T); подклассы задают коэффициенты"""
+
+    name = None
+    # Зависит ли α от температуры среды
+    uses_env = False
+
+    def __init__(self, temperatures, alphas):
+        self.temperatures = np.asarray(temperatures, dtype=np.float64)
+        self.alphas = np.asarray(alphas, dtype=np.float64)
+        self._temps = self.temperatures.tolist()
+        if len(self._temps) >= 2:
+            # coeffs[строка, интервал] = (a, b, c, d): α = a + b·dt + c·dt² + d·dt³
+            self.coeffs = self._coefficients(np.diff(self.temperatures),
+                                             np.diff(self.alphas, axis=1) / np.diff(self.temperatures))
+        else:
+            self.coeffs = np.empty((self.alphas.shape[0], 0, 4))
+
+    def _coefficients(self, h, delta):
+        raise NotImplementedError
+
+    # --- α_m(T) ---
+
+    def mean_alpha_at(self, row, t):
+        """α_m одной строки таблицы при температуре t"""
+        temps = self._temps
+        if not temps:
+            return float("nan")
+        if t <= temps[0]:
+            return self.alphas.item(row, 0)
+        if t >= temps[-1]:
+            return self.alphas.item(row, len(temps) - 1)
+        j = bisect_left(temps, t) - 1
+        a, b, c, d = self.coeffs[row, j].tolist()
+        dt = t - temps[j]
+        return a + dt * (b + dt * (c + dt * d))
+
+    def mean_alpha(self, rows, t):
+        """α_m для массивов строк и температур"""
+        rows = np.asarray(rows, dtype=np.intp)
+        t = np.asarray(t, dtype=np.float64)
+        temps = self.temperatures
+        if len(temps) == 0 or self.alphas.shape[0] == 0:
+            return np.full(rows.shape, np.nan)
+        if len(temps) == 1:
+            return self.alphas[rows, 0]
+
+        j = np.clip(np.searchsorted(temps, t, side="left") - 1, 0, len(temps) - 2)
+        coeffs = self.coeffs[rows, j]
+        dt = t - temps[j]
+        alpha = coeffs[:, 0] + dt * (coeffs[:, 1] + dt * (coeffs[:, 2] + dt * coeffs[:, 3]))
+        alpha = np.where(t <= temps[0], self.alphas[rows, 0], alpha)
+        return np.where(t >= temps[-1], self.alphas[rows, -1], alpha)
+
+    # --- α для расчета усадки ---
+
+    def alpha_at(self, row, env_temp, cut_temp):
+        """α одной строки для пары температур (среда, порезка)"""
+        return self.mean_alpha_at(row, cut_temp)
+
+    def alpha(self, rows, env_temps, cut_temps):
+        """α для массивов строк и температур"""
+        return self.mean_alpha(rows, cut_temps)
+
+
+class LinearModel(PiecewiseModel):
+    """Кусочно-линейная интерполяция α_m"""
+
+    name = "linear"
+
+    def _coefficients(self, h, delta):
+        coeffs = np.zeros(delta.shape + (4,))
+        coeffs[..., 0] = self.alphas[:, :-1]
+        coeffs[..., 1] = delta
+        return coeffs
+
+
+def _pchip_end_slope(h0, h1, delta0, delta1):
+    """Производная в крайнем узле (трехточечная формула с сохранением формы)"""
+    slope = ((2 * h0 + h1) * delta0 - h0 * delta1) / (h0 + h1)
+    slope = np.where(np.sign(slope) != np.sign(delta0), 0.0, slope)
+    overshoot = (np.sign(delta0) != np.sign(delta1)) & (np.abs(slope) > np.abs(3 * delta0))
+    return np.where(overshoot, 3 * delta0, slope)
+
+
+class SplineModel(PiecewiseModel):
+    """Монотонный кубический сплайн Эрмита (PCHIP) для α_m"""
+
+    name = "spline"
+
+    def _slopes(self, h, delta):
+        n = len(h) + 1
+        slopes = np.empty((delta.shape[0], n))
+        if n == 2:
+            slopes[:, 0] = slopes[:, 1] = delta[:, 0]
+            return slopes
+
+        # Внутренние узлы: взвешенное гармоническое среднее наклонов соседних
+        # интервалов, ноль в точках экстремума (сохраняет монотонность)
+        w1 = 2 * h[1:] + h[:-1]
+        w2 = h[1:] + 2 * h[:-1]
+        left, right = delta[:, :-1], delta[:, 1:]
+        same_sign = left * right > 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            harmonic = (w1 + w2) / (w1 / left + w2 / right)
+        slopes[:, 1:-1] = np.where(same_sign, harmonic, 0.0)
+
+        slopes[:, 0] = _pchip_end_slope(h[0], h[1], delta[:, 0], delta[:, 1])
+        slopes[:, -1] = _pchip_end_slope(h[-1], h[-2], delta[:, -1], delta[:, -2])
+        return slopes
+
+    def _coefficients(self, h, delta):
+        m = self._slopes(h, delta)
+        m0, m1 = m[:, :-1], m[:, 1:]
+        coeffs = np.empty(delta.shape + (4,))
+        coeffs[..., 0] = self.alphas[:, :-1]
+        coeffs[..., 1] = m0
+        coeffs[..., 2] = (3 * delta - 2 * m0 - m1) / h
+        coeffs[..., 3] = (m0 + m1 - 2 * delta) / h ** 2
+        return coeffs
+
+
+class IntegralModel(SplineModel):
+    """α, осредненный по интервалу [среда, порезка] через деформацию ε(T)"""
+
+    name = "integral"
+    uses_env = True
+
+    def alpha_at(self, row, env_temp, cut_temp):
+        if env_temp is None:
+            env_temp = T_REF
+        cut_alpha = self.mean_alpha_at(row, cut_temp)
+        if abs(cut_temp - env_temp) < 1e-9:
+            return cut_alpha
+        strain_cut = cut_alpha * (cut_temp - T_REF)
+        strain_env = self.mean_alpha_at(row, env_temp) * (env_temp - T_REF)
+        return (strain_cut - strain_env) / (cut_temp - env_temp)
+
+    def alpha(self, rows, env_temps, cut_temps):
+        env = np.asarray(env_temps, dtype=np.float64)
+        cut = np.asarray(cut_temps, dtype=np.float64)
+        cut_alpha = self.mean_alpha(rows, cut)
+        span = cut - env
+        with np.errstate(divide="ignore", invalid="ignore"):
+            alpha = (cut_alpha * (cut - T_REF) - self.mean_alpha(rows, env) * (env - T_REF)) / span
+        return np.where(np.abs(span) < 1e-9, cut_alpha, alpha)
+
+
+MODELS = {model.name: model for model in (LinearModel, SplineModel, IntegralModel)}
+DEFAULT_MODEL = LinearModel.name
+
+
+def make_model(name, temperatures, alphas):
+    """Модель по имени (см. MODELS); None - модель по умолчанию"""
+    try:
+        model = MODELS[name or DEFAULT_MODEL]
+    except KeyError:
+        raise ValueError(f"Неизвестная модель расширения: {name}")
+    return model(temperatures, alphas)
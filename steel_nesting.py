@@ -0,0 +1,248 @@
+"""Раскрой горячих штанг на кратные заготовки по нескольким заказам.
+
+Заказ задается кратностью (длина заготовки в холодном состоянии, мм) и
+числом еще не нарезанных заготовок. Для штанги известны длина в горячем
+состоянии и температура порезки; длина каждой заготовки на пиле равна
+кратности × (1 + α·ΔT), где α берется из таблицы steel_engine.AlphaTable
+(той же модели расширения, что и в остальных расчетах), плюс ширина реза.
+
+Выбор числа заготовок каждого заказа - ограниченная задача о рюкзаке, в
+которой ценность равна длине, то есть минимизируется обрезь. Она решается
+динамическим программированием по длине с шагом RESOLUTION_MM: число
+заготовок заказа раскладывается по степеням двойки, каждый предмет
+обрабатывается одной векторной операцией NumPy. Длины предметов
+округляются вверх, поэтому план всегда помещается в штангу.
+
+Таблица ДП строится сразу для всех длин до верхней границы диапазона
+(CAPACITY_STEP_MM), а ответ для конкретной штанги - максимум по префиксу.
+Таблицы кэшируются по набору длин заготовок и ограничений, поэтому
+соседние штанги с той же температурой (с точностью до округления длины) и
+близкой длиной планируются без повторного расчета. Матрица выбора
+хранится упакованной по битам, а кэш ограничен суммарным объемом таблиц
+(PLAN_CACHE_BYTES), а не их числом: ключ зависит от температуры, и за смену
+набирается много разных таблиц.
+
+Пример:
+    python steel_nesting.py --grade 40Х --env 20 --kerf 5 \\
+        --order 2400:30 --order 3100:12 --bar 11850:920 --bar 12010:905
+"""
+import argparse
+import math
+import sys
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from steel_data import active_data_path, open_steel_catalog
+from steel_engine import AlphaTable
+
+
+# Ширина реза пилы по умолчанию (мм)
+DEFAULT_KERF_MM = 5.0
+# Шаг дискретизации длины в ДП (мм)
+RESOLUTION_MM = 1.0
+# Таблицы ДП строятся для длин, кратных этому шагу (мм)
+CAPACITY_STEP_MM = 2000
+# Предельный объем таблиц ДП в кэше (байт)
+PLAN_CACHE_BYTES = 64 * 1024 * 1024
+
+CutOrder = namedtuple("CutOrder", ["name", "krata_step", "count"])
+# pieces - число заготовок по заказам (в порядке orders), piece_lengths -
+# длина одной заготовки каждого заказа на пиле (без реза)
+CutPlan = namedtuple("CutPlan", ["pieces", "piece_lengths", "used", "scrap"])
+
+
+def _knapsack(widths, counts, capacity):
+    """Достижимые суммы длин и выбор предметов для ограниченного рюкзака.
+
+    Возвращает (reachable, items, choice): reachable[c] - можно ли занять
+    ровно c единиц; бит c строки choice[k] (np.packbits) - сумма c впервые
+    достигнута предметом k.
+    """
+    items = []
+    for order, (width, count) in enumerate(zip(widths, counts)):
+        take = 1
+        while count > 0:
+            part = min(take, count)
+            if width * part <= capacity:
+                items.append((order, part, width * part))
+            count -= part
+            take *= 2
+
+    reachable = np.zeros(capacity + 1, dtype=bool)
+    reachable[0] = True
+    choice = np.zeros((len(items), (capacity + 8) // 8), dtype=np.uint8)
+    row = np.zeros(capacity + 1, dtype=bool)
+    for k, (_, _, weight) in enumerate(items):
+        added = reachable[:-weight] & ~reachable[weight:]
+        row[:weight] = False
+        row[weight:] = added
+        choice[k] = np.packbits(row)
+        reachable[weight:] |= added
+    reachable.flags.writeable = False
+    choice.flags.writeable = False
+    return reachable, tuple(items), choice
+
+
+class _TableCache:
+    """LRU-кэш таблиц ДП с ограничением по суммарному объему массивов"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, widths, counts, capacity):
+        key = (widths, counts, capacity)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+        table = _knapsack(widths, counts, capacity)
+        size = table[0].nbytes + table[2].nbytes
+        with self._lock:
+            if key not in self._tables and size <= self.max_bytes:
+                self._tables[key] = table
+                self.nbytes += size
+                while self.nbytes > self.max_bytes:
+                    _, (reachable, _, choice) = self._tables.popitem(last=False)
+                    self.nbytes -= reachable.nbytes + choice.nbytes
+        return table
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+            self.nbytes = 0
+
+
+_tables = _TableCache(PLAN_CACHE_BYTES)
+
+
+def solve_bounded_knapsack(widths, counts, capacity):
+    """Число предметов каждого вида с наибольшей суммой длин не больше capacity"""
+    if capacity <= 0 or not widths:
+        return [0] * len(widths), 0
+    bucket = math.ceil(capacity / CAPACITY_STEP_MM) * CAPACITY_STEP_MM
+    # Больше, чем помещается в самую длинную штангу диапазона, не понадобится
+    counts = tuple(min(c, bucket // w) for w, c in zip(widths, counts))
+    reachable, items, choice = _tables.get(tuple(widths), counts, bucket)
+
+    best = int(np.flatnonzero(reachable[:capacity + 1])[-1])
+    taken = [0] * len(widths)
+    position = best
+    for k in range(len(items) - 1, -1, -1):
+        if position and choice[k, position >> 3] >> (7 - (position & 7)) & 1:
+            order, part, weight = items[k]
+            taken[order] += part
+            position -= weight
+    return taken, best
+
+
+class NestingPlanner:
+    """Планирование раскроя штанг одной марки при заданной температуре среды"""
+
+    def __init__(self, table, grade, env_temp, kerf=DEFAULT_KERF_MM, resolution=RESOLUTION_MM):
+        if grade not in table:
+            raise ValueError("Марка стали не найдена")
+        if kerf < 0:
+            raise ValueError(f"Ширина реза не может быть отрицательной: {kerf}")
+        self.table = table
+        self.grade = grade
+        self.env_temp = env_temp
+        self.kerf = kerf
+        self.resolution = resolution
+
+    def factor(self, cut_temp):
+        """Множитель 1 + α·ΔT для температуры порезки"""
+        alpha = self.table.cached_alpha(self.grade, cut_temp, self.env_temp)
+        if math.isnan(alpha):
+            raise ValueError("Отсутствуют данные коэффициентов расширения")
+        return 1 + alpha * 1e-6 * (cut_temp - self.env_temp)
+
+    def plan(self, bar_length, cut_temp, orders):
+        """План раскроя одной штанги (длина в горячем состоянии, мм)"""
+        for order in orders:
+            if order.krata_step <= 0:
+                raise ValueError(f"Заказ {order.name}: кратность должна быть больше нуля")
+            if order.count < 0:
+                raise ValueError(f"Заказ {order.name}: отрицательное число заготовок")
+        factor = self.factor(cut_temp)
+        piece_lengths = [order.krata_step * factor for order in orders]
+        widths = [max(1, math.ceil((length + self.kerf) / self.resolution))
+                  for length in piece_lengths]
+        capacity = int(bar_length // self.resolution)
+        pieces, _ = solve_bounded_knapsack(widths, [order.count for order in orders], capacity)
+
+        used = sum(n * (length + self.kerf) for n, length in zip(pieces, piece_lengths))
+        return CutPlan(pieces, piece_lengths, used, bar_length - used)
+
+    def plan_bars(self, bars, orders):
+        """Последовательный раскрой штанг [(длина, температура порезки), ...].
+
+        После каждой штанги остаток заказов уменьшается; возвращает
+        (планы по штангам, оставшиеся заказы).
+        """
+        plans = []
+        orders = list(orders)
+        for bar_length, cut_temp in bars:
+            plan = self.plan(bar_length, cut_temp, orders)
+            plans.append(plan)
+            orders = [order._replace(count=order.count - n) for order, n in zip(orders, plan.pieces)]
+        return plans, orders
+
+
+def _parse_pair(text, first, second):
+    try:
+        a, b = text.split(":")
+        return float(a), float(b)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"ожидается {first}:{second}, получено {text}")
+
+
+def _parse_order(text):
+    step, count = _parse_pair(text, "КРАТНОСТЬ", "ЧИСЛО")
+    if step <= 0 or count <= 0 or not count.is_integer():
+        raise argparse.ArgumentTypeError(
+            f"кратность должна быть больше нуля, число - целым больше нуля; получено {text}")
+    return step, int(count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Раскрой горячих штанг на кратные заготовки")
+    parser.add_argument("--grade", required=True, help="марка стали")
+    parser.add_argument("--env", type=float, default=20.0, help="температура среды (°C)")
+    parser.add_argument("--kerf", type=float, default=DEFAULT_KERF_MM, help="ширина реза (мм)")
+    parser.add_argument("--order", action="append", default=[], metavar="КРАТНОСТЬ:ЧИСЛО",
+                        type=_parse_order)
+    parser.add_argument("--bar", action="append", default=[], metavar="ДЛИНА:ТЕМПЕРАТУРА",
+                        type=lambda t: _parse_pair(t, "ДЛИНА", "ТЕМПЕРАТУРА"))
+    parser.add_argument("--data", metavar="FILE", help="альтернативный файл steel_data.json")
+    parser.add_argument("--data-dir", metavar="DIR", help="внешний каталог со steel_data.json")
+    parser.add_argument("--model", help="модель коэффициента расширения")
+    args = parser.parse_args(argv)
+
+    orders = [CutOrder(f"{step:g}", step, count) for step, count in args.order]
+    try:
+        data_path = args.data or active_data_path(args.data_dir)
+        table = AlphaTable.from_catalog(open_steel_catalog(data_path), model=args.model)
+        planner = NestingPlanner(table, args.grade, args.env, args.kerf)
+        plans, remaining = planner.plan_bars(args.bar, orders)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+
+    for number, ((length, temp), plan) in enumerate(zip(args.bar, plans), 1):
+        cuts = ", ".join(f"{order.name} × {n} ({hot:.1f} мм)"
+                         for order, n, hot in zip(orders, plan.pieces, plan.piece_lengths) if n)
+        print(f"Штанга {number}: {length:g} мм при {temp:g} °C: {cuts or 'нет заготовок'}; "
+              f"обрезь {plan.scrap:.1f} мм")
+    left = ", ".join(f"{order.name} × {order.count}" for order in remaining if order.count)
+    print(f"Осталось нарезать: {left or 'ничего'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
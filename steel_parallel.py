@@ -0,0 +1,105 @@
+"""Параллельный расчет больших графиков порезки в пуле процессов.
+
+Каждый процесс-исполнитель один раз отображает в память скомпилированный
+справочник (steel_data.bin), поэтому таблица α физически разделяется между
+процессами через страничный кэш ОС, а steel_data.json не читается заново.
+Строки делятся на непрерывные части, результаты собираются в исходном порядке.
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from steel_data import SteelCatalog, ensure_compiled
+from steel_engine import BatchResult, compute_batch
+from steel_models import DEFAULT_MODEL
+
+
+# Минимальный размер части: меньшие задания не окупают пересылку между процессами
+MIN_SLICE_ROWS = 20000
+
+_worker_table = None
+
+
+def _init_worker(catalog_path, model):
+    global _worker_table
+    from steel_engine import AlphaTable
+
+    _worker_table = AlphaTable.from_catalog(SteelCatalog.from_file(catalog_path), model=model)
+
+
+def _call_with_table(func, args):
+    return func(_worker_table, *args)
+
+
+def _compute_slice(table, grades, env, cut, lengths):
+    return compute_batch(table, grades, env, cut, lengths)
+
+
+def default_workers():
+    """Число процессов по умолчанию - по числу ядер"""
+    return os.cpu_count() or 1
+
+
+class ParallelCalculator:
+    """Пул процессов с общей таблицей коэффициентов α.
+
+    Используется как контекстный менеджер:
+
+        with ParallelCalculator(workers=8) as calc:
+            result = calc.compute(grades, env, cut, lengths)
+    """
+
+    def __init__(self, workers=None, json_path=None, model=DEFAULT_MODEL):
+        self.workers = max(1, workers or default_workers())
+        self.catalog_path = ensure_compiled(json_path)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.catalog_path, model),
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Остановка процессов пула"""
+        self._pool.shutdown(cancel_futures=True)
+
+    def imap(self, func, args_iter, prefetch=None):
+        """Вызов func(table, *args) в исполнителях с сохранением порядка.
+
+        Одновременно в работе не более prefetch заданий (по умолчанию два на
+        процесс), поэтому входной итератор читается по мере записи результатов
+        и память остается ограниченной.
+        """
+        prefetch = prefetch or 2 * self.workers
+        pending = deque()
+        for args in args_iter:
+            pending.append(self._pool.submit(_call_with_table, func, args))
+            if len(pending) >= prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def compute(self, grades, env_temps, cut_temps, lengths):
+        """Аналог steel_engine.compute_batch с разбиением строк между процессами"""
+        grades = list(grades)
+        env = np.asarray(env_temps, dtype=np.float64)
+        cut = np.asarray(cut_temps, dtype=np.float64)
+        length = np.asarray(lengths, dtype=np.float64)
+        if not (len(grades) == len(env) == len(cut) == len(length)):
+            raise ValueError("Столбцы входных данных имеют разную длину")
+
+        size = max(MIN_SLICE_ROWS, -(-len(grades) // (4 * self.workers)))
+        bounds = [(start, min(start + size, len(grades))) for start in range(0, len(grades), size)]
+        parts = list(self.imap(_compute_slice, (
+            (grades[a:b], env[a:b], cut[a:b], length[a:b]) for a, b in bounds
+        )))
+        if not parts:
+            return BatchResult(*(np.empty(0) for _ in range(3)), np.empty(0, dtype=np.int8))
+        return BatchResult(*(np.concatenate(column) for column in zip(*parts)))
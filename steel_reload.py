@@ -0,0 +1,116 @@
+"""Обновление справочника сталей без перезапуска программы.
+
+DataReloader следит за файлом справочника: по умолчанию steel_data.json во
+внешнем каталоге данных (steel_data.default_data_dir), а если его нет -
+за встроенным. Интерфейс периодически вызывает poll из своего потока;
+сам poll только сравнивает отметку файла (mtime, размер).
+
+Изменение принимается, когда отметка не менялась между двумя опросами
+(файл дописан). Проверка, компиляция и построение таблицы α и индекса
+поиска выполняются в фоновом потоке. Готовый результат возвращается из
+poll целиком (DataUpdate), и интерфейс подменяет все ссылки разом в своем
+потоке, поэтому расчет никогда не видит наполовину обновленные данные.
+Ошибочный файл не заменяет действующий справочник, а ошибка любого рода
+возвращается в DataUpdate, чтобы фоновый поток не завершался молча.
+"""
+import os
+import threading
+from collections import namedtuple
+
+from steel_data import active_data_path, open_steel_catalog
+from steel_metrics import timer
+from steel_search import GradeSearchIndex
+
+
+DataUpdate = namedtuple("DataUpdate", [
+    "path", "catalog", "table", "search_index", "added", "removed", "changed", "error",
+])
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return path, stat.st_mtime_ns, stat.st_size
+
+
+def compare_tables(old, new):
+    """Разница справочников: (добавленные марки, удаленные, число измененных)"""
+    old_grades = set(old.grades) if old is not None else set()
+    new_grades = set(new.grades)
+    added = sorted(new_grades - old_grades)
+    removed = sorted(old_grades - new_grades)
+
+    changed = 0
+    if old is not None:
+        same_temps = (len(old.temperatures) == len(new.temperatures)
+                      and (old.temperatures == new.temperatures).all())
+        for grade in new_grades & old_grades:
+            old_row = old.alphas[old.index[grade]]
+            new_row = new.alphas[new.index[grade]]
+            if not same_temps or not (old_row == new_row).all():
+                changed += 1
+    return added, removed, changed
+
+
+class DataReloader:
+    """Наблюдение за файлом справочника и фоновая подготовка обновлений.
+
+    json_path задает конкретный файл (параметр --data); иначе
+    используется внешний каталог data_dir со встроенным справочником в
+    качестве запасного. model - модель расширения (None - по умолчанию).
+    """
+
+    def __init__(self, json_path=None, data_dir=None, model=None):
+        self.json_path = json_path
+        self.data_dir = data_dir
+        self.model = model
+        self._loaded = _stamp(self.current_path())
+        self._seen = self._loaded
+        self._worker = None
+        self._result = None
+
+    def current_path(self):
+        """Файл справочника, который должен быть загружен сейчас"""
+        return self.json_path or active_data_path(self.data_dir)
+
+    def poll(self, table=None):
+        """Проверка изменений; возвращает готовый DataUpdate или None.
+
+        table - действующая таблица α, с ней сравнивается новый справочник.
+        """
+        if self._worker is not None:
+            if self._worker.is_alive():
+                return None
+            self._worker, result, self._result = None, self._result, None
+            return result
+
+        stamp = _stamp(self.current_path())
+        if stamp is None or stamp == self._loaded:
+            self._seen = stamp
+            return None
+        if stamp != self._seen:
+            # Файл мог еще дописываться; ждем, пока отметка перестанет меняться
+            self._seen = stamp
+            return None
+
+        self._loaded = stamp
+        self._worker = threading.Thread(target=self._load, args=(stamp[0], table), daemon=True)
+        self._worker.start()
+        return None
+
+    def _load(self, path, old_table):
+        from steel_engine import AlphaTable
+
+        try:
+            with timer("data.reload"):
+                catalog = open_steel_catalog(path)
+                table = AlphaTable.from_catalog(catalog, model=self.model)
+                index = GradeSearchIndex(list(catalog.grades))
+                if len(table) == 0:
+                    raise ValueError("В справочнике нет ни одной марки")
+                added, removed, changed = compare_tables(old_table, table)
+            self._result = DataUpdate(path, catalog, table, index, added, removed, changed, None)
+        except Exception as e:
+            self._result = DataUpdate(path, None, None, None, [], [], 0, e)
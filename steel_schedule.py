@@ -0,0 +1,255 @@
+"""Потоковая обработка графиков порезки (CSV и Excel).
+
+Файл читается блоками по chunk_size строк, каждый блок считается
+векторно через steel_engine и сразу дописывается в выходной файл,
+поэтому расход памяти не зависит от размера графика.
+"""
+import csv
+import math
+import os
+from itertools import islice
+
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Допустимые заголовки столбцов: английские ключи и подписи из интерфейса
+COLUMN_ALIASES = {
+    "grade": ("grade", "Марка стали"),
+    "env_temp": ("env_temp", "Температура среды (°C)"),
+    "cut_temp": ("cut_temp", "Температура порезки (°C)"),
+    "length": ("length", "Длина проката (мм)"),
+    "krata_step": ("krata_step", "Кратность (мм)"),
+    "krata_count": ("krata_count", "Число крат"),
+    "cut_length": ("cut_length", "Длина порезки (мм)"),
+}
+
+RESULT_COLUMNS = ["alpha", "shrinkage", "cut_length", "error"]
+# Обратный расчет: по длине порезки (горячей) - длина в холодном состоянии
+INVERSE_RESULT_COLUMNS = ["alpha", "shrinkage", "length", "error"]
+
+
+def parse_number(value):
+    """Число из ячейки: допускается десятичная запятая, пустое значение - NaN"""
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().replace(" ", "").replace(",", ".")
+    if not text:
+        return math.nan
+    try:
+        return float(text)
+    except ValueError:
+        return math.nan
+
+
+def resolve_columns(header, inverse=False):
+    """Сопоставление заголовков файла с полями расчета"""
+    positions = {}
+    normalized = [str(name).strip() if name is not None else "" for name in header]
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                positions[field] = normalized.index(alias)
+                break
+
+    missing = [f for f in ("grade", "env_temp", "cut_temp") if f not in positions]
+    if inverse:
+        if "cut_length" not in positions:
+            missing.append("cut_length")
+    elif "length" not in positions and not {"krata_step", "krata_count"} <= positions.keys():
+        missing.append("length")
+    if missing:
+        raise ValueError(f"В графике нет столбцов: {', '.join(missing)}")
+    return positions
+
+
+def _iter_csv_rows(path):
+    with open(path, "r", encoding="utf-8-sig", newline="") as file:
+        sample = file.read(4096)
+        file.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=";,\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(file, dialect)
+
+
+def _iter_xlsx_rows(path):
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_schedule_rows(path):
+    """Построчное чтение графика порезки (первая строка - заголовок)"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        return _iter_xlsx_rows(path)
+    if ext in (".csv", ".txt"):
+        return _iter_csv_rows(path)
+    raise ValueError(f"Неподдерживаемый формат файла: {ext}")
+
+
+def open_schedule(path, inverse=False):
+    """Открытие графика: (заголовок, позиции столбцов, итератор строк данных)"""
+    rows = iter_schedule_rows(path)
+    header = list(next(rows, None) or [])
+    return header, resolve_columns(header, inverse), rows
+
+
+def iter_row_chunks(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Разбиение строк на блоки с пропуском пустых строк"""
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        chunk = [row for row in chunk if row and any(cell not in (None, "") for cell in row)]
+        if chunk:
+            yield chunk
+
+
+def read_schedule_chunks(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Чтение графика блоками: (заголовок, строки блока, столбцы для расчета)"""
+    header, positions, rows = open_schedule(path)
+    for chunk in iter_row_chunks(rows, chunk_size):
+        yield header, chunk, chunk_columns(chunk, positions)
+
+
+def _cell(row, position):
+    if position is None or position >= len(row):
+        return None
+    return row[position]
+
+
+def chunk_columns(chunk, positions):
+    """Столбцы для расчета из строк блока"""
+    grade_pos = positions["grade"]
+    grades = [str(_cell(row, grade_pos) or "").strip() for row in chunk]
+    env = [parse_number(_cell(row, positions["env_temp"])) for row in chunk]
+    cut = [parse_number(_cell(row, positions["cut_temp"])) for row in chunk]
+
+    # Длина берется из меры, а при её отсутствии - как кратность × число крат
+    length = [parse_number(_cell(row, positions.get("length"))) for row in chunk]
+    if "krata_step" in positions:
+        for i, row in enumerate(chunk):
+            if math.isnan(length[i]):
+                step = parse_number(_cell(row, positions["krata_step"]))
+                count = parse_number(_cell(row, positions.get("krata_count")))
+                length[i] = step * count
+    columns = {"grade": grades, "env_temp": env, "cut_temp": cut, "length": length}
+    if "cut_length" in positions:
+        columns["cut_length"] = [parse_number(_cell(row, positions["cut_length"])) for row in chunk]
+    return columns
+
+
+class _CsvResultWriter:
+    def __init__(self, path):
+        self.file = open(path, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.writer(self.file, delimiter=";")
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _XlsxResultWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+def open_result_writer(path):
+    """Потоковая запись результатов в CSV или Excel"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".xlsx":
+        return _XlsxResultWriter(path)
+    if ext in (".csv", ".txt"):
+        return _CsvResultWriter(path)
+    raise ValueError(f"Неподдерживаемый формат файла: {ext}")
+
+
+def _result_cell(value):
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+def compute_chunk(table, chunk, positions, inverse=False):
+    """Расчет блока строк: (строки с результатами, число строк с ошибками)"""
+    from steel_engine import compute_columns, error_message, solve_lengths
+
+    columns = chunk_columns(chunk, positions)
+    if inverse:
+        result = solve_lengths(table, columns["grade"], columns["env_temp"],
+                               columns["cut_temp"], columns["cut_length"])
+        lengths = result.length
+    else:
+        result = compute_columns(table, columns)
+        lengths = result.cut_length
+    out_rows = []
+    failed = 0
+    for i, row in enumerate(chunk):
+        code = int(result.errors[i])
+        out_rows.append(list(row) + [
+            _result_cell(result.alpha[i]),
+            _result_cell(result.shrinkage[i]),
+            _result_cell(lengths[i]),
+            error_message(code),
+        ])
+        failed += code != 0
+    return out_rows, failed
+
+
+def process_schedule(table, input_path, output_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                     progress=None, calculator=None, inverse=False):
+    """Расчет графика порезки с потоковой записью результата.
+
+    Если передан calculator (steel_parallel.ParallelCalculator), блоки
+    считаются в пуле процессов, а результаты записываются в исходном порядке.
+    При inverse=True по столбцу cut_length (длина порезки) считается длина
+    в холодном состоянии. Возвращает кортеж (число строк, число строк с ошибками).
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"Размер блока должен быть положительным, получено {chunk_size}")
+    header, positions, rows = open_schedule(input_path, inverse)
+    chunks = iter_row_chunks(rows, chunk_size)
+    if calculator is not None:
+        results = calculator.imap(compute_chunk, ((chunk, positions, inverse) for chunk in chunks))
+    else:
+        results = (compute_chunk(table, chunk, positions, inverse) for chunk in chunks)
+
+    total = failed = 0
+    writer = open_result_writer(output_path)
+    try:
+        writer.write_rows([header + (INVERSE_RESULT_COLUMNS if inverse else RESULT_COLUMNS)])
+        for out_rows, chunk_failed in results:
+            writer.write_rows(out_rows)
+            total += len(out_rows)
+            failed += chunk_failed
+            if progress:
+                progress(total)
+    finally:
+        writer.close()
+    return total, failed
+
+
+def default_output_path(input_path):
+    """Имя выходного файла по умолчанию: <имя>_result.csv"""
+    base, _ = os.path.splitext(input_path)
+    return f"{base}_result.csv"
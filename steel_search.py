@@ -0,0 +1,83 @@
+"""Индекс поиска марок стали для выпадающего списка.
+
+Названия марок приводятся к единому виду: нижний регистр, латинские
+буквы-двойники заменяются кириллическими (X → Х, C → С и т.д.), поэтому
+"12x18h10t" находит "12Х18Н10Т". Поиск идет по заранее построенному
+индексу биграмм и сужает предыдущий результат, пока пользователь
+дописывает запрос.
+"""
+
+# Латинские буквы и цифры, похожие на кириллические, сводятся к одному символу
+_LOOKALIKES = str.maketrans({
+    "a": "а", "b": "в", "c": "с", "e": "е", "h": "н", "k": "к", "m": "м",
+    "o": "о", "p": "р", "t": "т", "x": "х", "y": "у", "з": "3", "ё": "е",
+})
+
+
+def normalize(text):
+    """Приведение названия марки или запроса к виду для сравнения"""
+    return text.strip().lower().translate(_LOOKALIKES)
+
+
+def _grams(key):
+    if len(key) < 2:
+        return set(key)
+    return {key[i:i + 2] for i in range(len(key) - 1)}
+
+
+def _is_subsequence(query, key):
+    chars = iter(key)
+    return all(ch in chars for ch in query)
+
+
+class GradeSearchIndex:
+    """Индекс марок: префиксный, подстрочный и нечеткий поиск"""
+
+    def __init__(self, grades):
+        self.grades = list(grades)
+        self.keys = [normalize(g) for g in self.grades]
+
+        # Биграмма (или одиночный символ) -> номера марок, содержащих её
+        self._postings = {}
+        for pos, key in enumerate(self.keys):
+            for gram in _grams(key) | set(key):
+                self._postings.setdefault(gram, set()).add(pos)
+
+        self._last_query = ""
+        self._last_matches = list(range(len(self.grades)))
+
+    def _candidates(self, query):
+        grams = _grams(query) if len(query) >= 2 else {query}
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        if not postings or not postings[0]:
+            return []
+        found = set(postings[0]).intersection(*postings[1:])
+        return sorted(found)
+
+    def _match(self, query):
+        if not query:
+            return list(range(len(self.grades)))
+        # Дописывание запроса только сужает выдачу: фильтруем прошлый результат
+        if self._last_query and query.startswith(self._last_query):
+            pool = self._last_matches
+        else:
+            pool = self._candidates(query)
+        return [pos for pos in pool if query in self.keys[pos]]
+
+    def search(self, text):
+        """Марки, подходящие под запрос: сначала по началу названия, затем по вхождению.
+
+        Если точных вхождений нет, возвращаются марки, содержащие символы
+        запроса в том же порядке (например, "12х18т" → "12Х18Н10Т").
+        """
+        query = normalize(text)
+        matches = self._match(query)
+        self._last_query, self._last_matches = query, matches
+
+        if not matches and query:
+            return [g for g, key in zip(self.grades, self.keys) if _is_subsequence(query, key)]
+
+        prefix = [pos for pos in matches if self.keys[pos].startswith(query)]
+        prefix_set = set(prefix)
+        rest = [pos for pos in matches if pos not in prefix_set]
+        return [self.grades[pos] for pos in prefix + rest]
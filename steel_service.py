@@ -0,0 +1,266 @@
+"""Локальный HTTP/JSON сервис расчета длины порезки (без графического интерфейса).
+
+Справочник загружается один раз при запуске, дальше все запросы работают
+с одной и той же таблицей α. Сервис написан на asyncio и стандартной
+библиотеке, поддерживает постоянные соединения (keep-alive).
+
+Точки доступа:
+    GET  /health            состояние сервиса и число марок
+    POST /calculate         одна строка: {"grade", "env_temp", "cut_temp", "length"}
+                            (вместо length можно передать krata_step и krata_count)
+    POST /calculate/batch   {"rows": [{...}, ...]} или столбцы
+                            {"grade": [...], "env_temp": [...], "cut_temp": [...], "length": [...]}
+
+Логика запросов вынесена в CalculationService.handle, поэтому её можно
+проверять без сети, вызывая handle напрямую.
+
+Запуск:
+    python steel_service.py [--host 127.0.0.1] [--port 8765] [--data FILE]
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+
+from steel_data import active_data_path, open_steel_catalog
+from steel_engine import AlphaTable, compute_batch, error_message, OK, ERR_UNKNOWN_GRADE, ERR_INVALID_INPUT
+from steel_models import DEFAULT_MODEL, MODELS
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Максимальный размер тела запроса (байт)
+MAX_BODY_SIZE = 64 * 1024 * 1024
+# Запросы больше этого размера (байт) считаются в отдельном потоке,
+# чтобы не задерживать остальных клиентов
+OFFLOAD_BODY_SIZE = 512 * 1024
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class RequestError(Exception):
+    """Ошибка запроса с HTTP-кодом ответа"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return math.nan
+    return float(value)
+
+
+def _grade(value):
+    return value if isinstance(value, str) else ""
+
+
+def _row_length(row):
+    if "length" in row:
+        return _number(row["length"])
+    return _number(row.get("krata_step")) * _number(row.get("krata_count"))
+
+
+def _json_column(values):
+    return [None if math.isnan(v) else round(v, 6) for v in values.tolist()]
+
+
+class CalculationService:
+    """Обработка запросов расчета поверх загруженной таблицы α"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def calculate_one(self, row):
+        """Расчет одной строки через кэш α"""
+        if not isinstance(row, dict):
+            raise RequestError(400, "Ожидается JSON-объект")
+        grade = row.get("grade")
+        env, cut, length = _number(row.get("env_temp")), _number(row.get("cut_temp")), _row_length(row)
+
+        if not isinstance(grade, str) or grade not in self.table:
+            code = ERR_UNKNOWN_GRADE
+        elif not all(math.isfinite(v) for v in (env, cut, length)):
+            code = ERR_INVALID_INPUT
+        else:
+            code = OK
+        if code != OK:
+            return {"alpha": None, "shrinkage": None, "cut_length": None,
+                    "error": code, "message": error_message(code)}
+
+        alpha = self.table.cached_alpha(grade, cut, env)
+        shrinkage = alpha * 1e-6 * (cut - env) * length
+        return {"alpha": round(alpha, 6), "shrinkage": round(shrinkage, 6),
+                "cut_length": round(length + shrinkage, 6), "error": OK, "message": ""}
+
+    def calculate_batch(self, body):
+        """Векторный расчет пакета строк или столбцов"""
+        if isinstance(body, dict) and isinstance(body.get("rows"), list):
+            rows = body["rows"]
+            if not all(isinstance(row, dict) for row in rows):
+                raise RequestError(400, "Каждая строка пакета должна быть JSON-объектом")
+            grades = [_grade(row.get("grade")) for row in rows]
+            env = [_number(row.get("env_temp")) for row in rows]
+            cut = [_number(row.get("cut_temp")) for row in rows]
+            lengths = [_row_length(row) for row in rows]
+        elif isinstance(body, dict) and all(isinstance(body.get(k), list)
+                                            for k in ("grade", "env_temp", "cut_temp", "length")):
+            grades = [_grade(v) for v in body["grade"]]
+            env = [_number(v) for v in body["env_temp"]]
+            cut = [_number(v) for v in body["cut_temp"]]
+            lengths = [_number(v) for v in body["length"]]
+        else:
+            raise RequestError(400, "Ожидается {\"rows\": [...]} или столбцы grade, env_temp, cut_temp, length")
+
+        try:
+            result = compute_batch(self.table, grades, env, cut, lengths)
+        except ValueError as e:
+            raise RequestError(400, str(e))
+        return {
+            "alpha": _json_column(result.alpha),
+            "shrinkage": _json_column(result.shrinkage),
+            "cut_length": _json_column(result.cut_length),
+            "error": result.errors.tolist(),
+        }
+
+    def handle(self, method, path, body=b""):
+        """Обработка запроса: возвращает (HTTP-код, объект для JSON-ответа)"""
+        try:
+            if path == "/health":
+                if method != "GET":
+                    raise RequestError(405, "Метод не поддерживается")
+                return 200, {"status": "ok", "grades": len(self.table), "model": self.table.model.name}
+            if path not in ("/calculate", "/calculate/batch"):
+                raise RequestError(404, "Неизвестный адрес")
+            if method != "POST":
+                raise RequestError(405, "Метод не поддерживается")
+            try:
+                payload = json.loads(body or b"null")
+            except ValueError:
+                raise RequestError(400, "Некорректный JSON")
+            if path == "/calculate":
+                return 200, self.calculate_one(payload)
+            return 200, self.calculate_batch(payload)
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"Произошла ошибка: {str(e)}"}
+
+
+async def _read_request(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, version = lines[0].split(" ", 2)
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    # Только десятичные цифры: int() принял бы и "-5", и "+5", и " 5"
+    length = headers.get("content-length", "0")
+    if not (length.isascii() and length.isdigit()):
+        raise RequestError(400, "Некорректный заголовок Content-Length")
+    size = int(length)
+    if size > MAX_BODY_SIZE:
+        raise RequestError(413, "Слишком большой запрос")
+    body = await reader.readexactly(size) if size else b""
+    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+    return method, path.split("?", 1)[0], body, keep_alive
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class CalculationServer:
+    """asyncio-сервер поверх CalculationService"""
+
+    def __init__(self, service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.service = service
+        self.host = host
+        self.port = port
+        self._server = None
+
+    async def start(self):
+        """Запуск прослушивания; при port=0 порт выбирается системой"""
+        self._server = await asyncio.start_server(self._serve_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    method, path, body, keep_alive = await _read_request(reader)
+                except RequestError as e:
+                    writer.write(_response(e.status, {"error": str(e)}, False))
+                    break
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+                    break
+
+                if len(body) > OFFLOAD_BODY_SIZE:
+                    status, payload = await loop.run_in_executor(
+                        None, self.service.handle, method, path, body)
+                else:
+                    status, payload = self.service.handle(method, path, body)
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(table, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Запуск сервиса до прерывания"""
+    server = await CalculationServer(CalculationService(table), host, port).start()
+    print(f"Сервис расчета запущен: http://{server.host}:{server.port}")
+    await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервис расчета длины порезки")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--data", metavar="FILE", help="альтернативный файл steel_data.json")
+    parser.add_argument("--data-dir", metavar="DIR", help="внешний каталог со steel_data.json")
+    parser.add_argument("--model", choices=sorted(MODELS), default=DEFAULT_MODEL,
+                        help="модель коэффициента расширения")
+    args = parser.parse_args(argv)
+
+    try:
+        data_path = args.data or active_data_path(args.data_dir)
+        table = AlphaTable.from_catalog(open_steel_catalog(data_path), model=args.model)
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    try:
+        asyncio.run(serve(table, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
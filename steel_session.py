@@ -0,0 +1,170 @@
+"""Хранилище записей текущей сессии.
+
+Записи хранятся по столбцам в компактных массивах (array) с исходными
+числовыми значениями; строки для таблиц интерфейса формируются только при
+отображении (format_record). Марки хранятся один раз в справочнике имен,
+в записи - номер марки.
+
+Добавление и удаление записи выполняются за O(1): удаленная запись лишь
+помечается, а её номер (record_id) у остальных записей не меняется.
+"""
+from array import array
+from collections import namedtuple
+
+
+SessionRecord = namedtuple("SessionRecord", [
+    "grade", "env_temp", "cut_temp", "alpha", "length",
+    "shrinkage", "cut_length", "krata_step", "krata_count",
+])
+
+# Числовые столбцы хранилища (float64)
+NUMERIC_FIELDS = ("env_temp", "cut_temp", "alpha", "length", "shrinkage", "cut_length")
+
+# Поля записи в порядке столбцов таблицы интерфейса
+DISPLAY_FIELDS = ("grade",) + NUMERIC_FIELDS
+
+# Заголовки столбцов при экспорте
+EXPORT_COLUMNS = {
+    "grade": "Марка стали",
+    "env_temp": "Температура среды (°C)",
+    "cut_temp": "Температура порезки (°C)",
+    "alpha": "Коэффициент α (×10⁻⁶/K)",
+    "length": "Длина проката (мм)",
+    "krata_step": "Кратность (мм)",
+    "krata_count": "Число крат",
+    "shrinkage": "Усадка (мм)",
+    "cut_length": "Длина порезки (мм)",
+}
+
+
+def format_record(record):
+    """Строки для отображения записи в таблице интерфейса"""
+    if record.krata_count:
+        length_info = f"{record.krata_step} × {record.krata_count}"
+    else:
+        length_info = f"{record.length:.0f} мм"
+    return (
+        record.grade,
+        f"{record.env_temp:.0f}°C",
+        f"{record.cut_temp:.0f}°C",
+        f"{record.alpha:.2f}×10⁻⁶/K",
+        length_info,
+        f"{record.shrinkage:.2f} мм",
+        f"{record.cut_length:.0f} мм"
+    )
+
+
+class SessionStore:
+    """Колоночное хранилище записей сессии"""
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Удаление всех записей"""
+        self.grade_names = []
+        self._grade_ids = {}
+        self._grade = array("i")
+        self._numeric = {name: array("d") for name in NUMERIC_FIELDS}
+        self._krata_step = array("i")
+        self._krata_count = array("i")
+        self._alive = bytearray()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def _grade_id(self, grade):
+        grade_id = self._grade_ids.get(grade)
+        if grade_id is None:
+            grade_id = self._grade_ids[grade] = len(self.grade_names)
+            self.grade_names.append(grade)
+        return grade_id
+
+    def append(self, record):
+        """Добавление записи; возвращает её номер"""
+        record_id = len(self._alive)
+        self._grade.append(self._grade_id(record.grade))
+        for name in NUMERIC_FIELDS:
+            self._numeric[name].append(getattr(record, name))
+        self._krata_step.append(record.krata_step)
+        self._krata_count.append(record.krata_count)
+        self._alive.append(1)
+        self._count += 1
+        return record_id
+
+    def remove(self, record_id):
+        """Удаление записи по номеру"""
+        if 0 <= record_id < len(self._alive) and self._alive[record_id]:
+            self._alive[record_id] = 0
+            self._count -= 1
+
+    def get(self, record_id):
+        """Запись по номеру"""
+        if not (0 <= record_id < len(self._alive) and self._alive[record_id]):
+            raise KeyError(record_id)
+        numeric = self._numeric
+        return SessionRecord(
+            self.grade_names[self._grade[record_id]],
+            *(numeric[name][record_id] for name in NUMERIC_FIELDS),
+            self._krata_step[record_id],
+            self._krata_count[record_id],
+        )
+
+    def ids(self):
+        """Номера действующих записей в порядке добавления"""
+        alive = self._alive
+        return [i for i in range(len(alive)) if alive[i]]
+
+    def sort_key(self, field):
+        """Функция ключа для сортировки номеров записей по полю"""
+        if field == "grade":
+            names, grades = self.grade_names, self._grade
+            return lambda record_id: names[grades[record_id]]
+        return self._numeric[field].__getitem__
+
+    def select(self, grade_filter=None, temperature=None):
+        """Номера записей, подходящих под фильтр.
+
+        grade_filter(название) -> bool отбирает марки (проверяется один раз
+        на марку, а не на запись); temperature - температура среды или порезки.
+        """
+        ids = self.ids()
+        if grade_filter is None and temperature is None:
+            return ids
+        if grade_filter is not None:
+            allowed = {gid for gid, name in enumerate(self.grade_names) if grade_filter(name)}
+            grades = self._grade
+            ids = [i for i in ids if grades[i] in allowed]
+        if temperature is not None:
+            env, cut = self._numeric["env_temp"], self._numeric["cut_temp"]
+            ids = [i for i in ids if env[i] == temperature or cut[i] == temperature]
+        return ids
+
+    def matches(self, record_id, grade_filter=None, temperature=None):
+        """Подходит ли запись под фильтр (см. select)"""
+        if grade_filter is not None and not grade_filter(self.grade_names[self._grade[record_id]]):
+            return False
+        if temperature is not None:
+            return temperature in (self._numeric["env_temp"][record_id],
+                                   self._numeric["cut_temp"][record_id])
+        return True
+
+    def __iter__(self):
+        for record_id in self.ids():
+            yield self.get(record_id)
+
+    def columns(self):
+        """Действующие записи по столбцам с числовыми значениями (для экспорта)"""
+        ids = self.ids()
+        names = self.grade_names
+        columns = {"grade": [names[self._grade[i]] for i in ids]}
+        for name in NUMERIC_FIELDS:
+            values = self._numeric[name]
+            columns[name] = [values[i] for i in ids]
+        columns["krata_step"] = [self._krata_step[i] or None for i in ids]
+        columns["krata_count"] = [self._krata_count[i] or None for i in ids]
+        return columns
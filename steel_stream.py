@@ -0,0 +1,269 @@
+"""Поток показаний пирометра для расчета в реальном времени.
+
+Источник задается строкой:
+    sim[:ТЕМПЕРАТУРА]       встроенный имитатор (по умолчанию около 950 °C)
+    tcp:ХОСТ:ПОРТ           текстовый поток по TCP
+    serial:ПОРТ[:СКОРОСТЬ]  последовательный порт (нужен пакет pyserial)
+    file:ПУТЬ или ПУТЬ      файл или именованный канал; "-" - стандартный ввод
+
+Каждая строка источника - одно показание; из строки берется первое число
+(допускаются "951.3", "T=951,3 C" и т.п.). Показания вне допустимого
+диапазона отбрасываются.
+
+PyrometerReader читает источник в фоновом потоке и сглаживает показания:
+медиана по последним MEDIAN_WINDOW отсчетам убирает одиночные выбросы,
+затем экспоненциальное сглаживание с постоянной времени SMOOTHING_S.
+Интерфейс не получает каждое показание, а опрашивает последнее
+сглаженное значение с ограниченной частотой кадров, поэтому очередь не
+накапливается и задержка не растет при любой частоте пирометра. Значение
+старше STALE_AFTER_S считается устаревшим (источник замолчал или шлет
+только отбракованные показания).
+
+Сокет и последовательный порт читаются с тайм-аутом READ_TIMEOUT_S, так
+что остановка чтения освобождает порт даже при молчащем источнике.
+
+Имитатор для проверки без оборудования:
+    python steel_stream.py --serve 9100 [--rate 50]
+и в калькуляторе: --pyrometer tcp:127.0.0.1:9100
+"""
+import argparse
+import math
+import random
+import re
+import socket
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+
+
+# Допустимый диапазон показаний (°C)
+MIN_READING = 0.0
+MAX_READING = 1600.0
+# Окно медианного фильтра (отсчетов)
+MEDIAN_WINDOW = 5
+# Постоянная времени экспоненциального сглаживания (с)
+SMOOTHING_S = 0.3
+# Частота имитатора по умолчанию (показаний в секунду)
+SIMULATOR_RATE = 50
+# Тайм-аут чтения сокета и порта (с): с этим периодом проверяется остановка
+READ_TIMEOUT_S = 0.2
+# Возраст показания, после которого оно считается устаревшим (с)
+STALE_AFTER_S = 1.0
+
+_NUMBER = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
+
+
+def parse_reading(line):
+    """Температура из строки источника или None"""
+    match = _NUMBER.search(line)
+    if match is None:
+        return None
+    value = float(match.group().replace(",", "."))
+    if not MIN_READING <= value <= MAX_READING:
+        return None
+    return value
+
+
+# --- Источники: итераторы текстовых строк (None - тайм-аут без данных) ---
+
+def simulate(base=950.0, rate=SIMULATOR_RATE, noise=3.0, seed=None):
+    """Имитатор пирометра: медленный дрейф, шум и редкие выбросы"""
+    rng = random.Random(seed)
+    period = 1.0 / rate
+    start = next_time = time.monotonic()
+    while True:
+        t = time.monotonic() - start
+        value = base + 25.0 * math.sin(t / 20.0) + rng.gauss(0.0, noise)
+        if rng.random() < 0.01:
+            value += rng.choice((-1, 1)) * rng.uniform(100.0, 300.0)
+        yield f"{value:.1f}"
+        next_time += period
+        time.sleep(max(0.0, next_time - time.monotonic()))
+
+
+def _iter_socket_lines(sock):
+    # makefile после тайм-аута непригоден, поэтому строки собираются вручную
+    with sock:
+        sock.settimeout(READ_TIMEOUT_S)
+        buffer = b""
+        while True:
+            try:
+                chunk = sock.recv(4096)
+            except socket.timeout:
+                yield None
+                continue
+            if not chunk:
+                break
+            *lines, buffer = (buffer + chunk).split(b"\n")
+            for line in lines:
+                yield line.decode("ascii", errors="replace")
+        if buffer:
+            yield buffer.decode("ascii", errors="replace")
+
+
+def _iter_file_lines(path):
+    if path == "-":
+        yield from sys.stdin
+        return
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        yield from file
+
+
+def _iter_serial_lines(port, baudrate):
+    try:
+        import serial
+    except ImportError:
+        raise ValueError("Для чтения последовательного порта требуется пакет pyserial")
+    with serial.Serial(port, baudrate, timeout=READ_TIMEOUT_S) as device:
+        while True:
+            line = device.readline()
+            yield line.decode("ascii", errors="replace") if line else None
+
+
+def open_source(spec):
+    """Итератор строк источника по его описанию (см. описание модуля)"""
+    kind, _, rest = spec.partition(":")
+    if kind == "sim":
+        return simulate(float(rest) if rest else 950.0)
+    if kind == "tcp":
+        host, _, port = rest.rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Ожидается tcp:ХОСТ:ПОРТ, получено: {spec}")
+        return _iter_socket_lines(socket.create_connection((host, int(port)), timeout=5.0))
+    if kind == "serial":
+        port, _, baudrate = rest.partition(":")
+        return _iter_serial_lines(port, int(baudrate or 9600))
+    if kind == "file":
+        return _iter_file_lines(rest)
+    return _iter_file_lines(spec)
+
+
+class PyrometerReader:
+    """Фоновое чтение и сглаживание показаний пирометра"""
+
+    def __init__(self, spec, smoothing_s=SMOOTHING_S, median_window=MEDIAN_WINDOW):
+        self.spec = spec
+        self.smoothing_s = smoothing_s
+        self.samples = 0
+        self.rejected = 0
+        self.error = None
+        # (значение, время monotonic) - один атрибут, чтобы читатель не увидел
+        # значение от одного показания, а время от другого
+        self._latest = (None, None)
+        self._window = deque(maxlen=median_window)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, wait=2 * READ_TIMEOUT_S):
+        """Остановка чтения с ожиданием закрытия источника.
+
+        Сокет и порт закрываются не позже READ_TIMEOUT_S; чтение файла или
+        канала завершится только после следующей строки.
+        """
+        self._stop.set()
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self._thread.join(wait)
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def latest(self):
+        """Последнее сглаженное значение и время его получения (monotonic)"""
+        return self._latest
+
+    def is_stale(self, now=None, limit=STALE_AFTER_S):
+        """Нет показания или оно получено раньше limit секунд назад"""
+        value, updated = self._latest
+        now = time.monotonic() if now is None else now
+        return value is None or now - updated > limit
+
+    def add(self, reading, now=None):
+        """Учет одного показания (вызывается потоком чтения)"""
+        now = time.monotonic() if now is None else now
+        if reading is None:
+            self.rejected += 1
+            return
+        self.samples += 1
+        self._window.append(reading)
+        filtered = statistics.median(self._window)
+        previous, updated = self._latest
+        if previous is None:
+            value = filtered
+        else:
+            weight = 1.0 - math.exp(-(now - updated) / self.smoothing_s)
+            value = previous + weight * (filtered - previous)
+        self._latest = (value, now)
+
+    def _run(self):
+        try:
+            source = open_source(self.spec)
+            try:
+                for line in source:
+                    if self._stop.is_set():
+                        break
+                    if line is not None:
+                        self.add(parse_reading(line))
+            finally:
+                # Закрытие генератора закрывает сокет или порт
+                source.close()
+        except (OSError, ValueError) as e:
+            self.error = e
+
+
+def serve_simulator(port, rate=SIMULATOR_RATE, host="127.0.0.1"):
+    """TCP-сервер имитатора: каждому клиенту отдается свой поток показаний"""
+    def client(conn):
+        with conn:
+            try:
+                for line in simulate(rate=rate):
+                    conn.sendall((line + "\n").encode("ascii"))
+            except OSError:
+                pass
+
+    with socket.create_server((host, port)) as server:
+        print(f"Имитатор пирометра: tcp:{host}:{port}, {rate} показаний/с")
+        while True:
+            conn, _ = server.accept()
+            threading.Thread(target=client, args=(conn,), daemon=True).start()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Имитатор и проверка потока пирометра")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="запустить TCP-имитатор")
+    parser.add_argument("--rate", type=int, default=SIMULATOR_RATE, help="показаний в секунду")
+    parser.add_argument("--read", metavar="SPEC", help="печатать сглаженные показания источника")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.serve is not None:
+            serve_simulator(args.serve, args.rate)
+        elif args.read:
+            reader = PyrometerReader(args.read).start()
+            while reader.running:
+                time.sleep(0.5)
+                value, _ = reader.latest()
+                if value is not None:
+                    stale = " (устарело)" if reader.is_stale() else ""
+                    print(f"{value:7.1f} °C{stale}  показаний: {reader.samples}, "
+                          f"отброшено: {reader.rejected}")
+            if reader.error:
+                raise reader.error
+        else:
+            parser.print_help()
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Виджеты интерфейса калькулятора."""
+from tkinter import ttk
+
+
+class VirtualTable(ttk.Frame):
+    """Таблица, отображающая только видимое окно строк.
+
+    Сами данные хранятся снаружи (например, в steel_session.SessionStore),
+    таблица держит лишь список номеров записей в порядке показа (view) и
+    создает в Treeview не больше строк, чем помещается на экране. Поэтому
+    добавление, прокрутка и очистка не зависят от числа записей.
+
+    row_source(record_id) возвращает кортеж строк для отображения записи,
+    sort_key(column_index) - функцию ключа сортировки номеров записей.
+    """
+
+    def __init__(self, parent, columns, widths, row_source, sort_key=None, height=5):
+        super().__init__(parent)
+        self.row_source = row_source
+        self.sort_key = sort_key
+        self.columns = columns
+        self.view = []
+        self.offset = 0
+        self.visible_rows = height
+        self.sort_column = None
+        self.sort_reverse = False
+        self._selected = set()
+        self._rendering = False
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height,
+                                 selectmode="extended")
+        for index, (col, width) in enumerate(zip(columns, widths)):
+            self.tree.heading(col, text=col, anchor="center",
+                              command=lambda i=index: self.sort_by(i))
+            self.tree.column(col, width=width, anchor="center")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+
+    def bind_tree(self, sequence, func):
+        """Привязка обработчика событий к таблице"""
+        self.tree.bind(sequence, func)
+
+    # --- Данные ---
+
+    def set_rows(self, record_ids):
+        """Замена отображаемого набора записей"""
+        self.view = list(record_ids)
+        if self.sort_column is not None:
+            self._sort_view()
+        self.offset = 0
+        self._selected.clear()
+        self.render()
+
+    def append(self, record_id):
+        """Добавление записи с прокруткой к ней"""
+        self.view.append(record_id)
+        if self.sort_column is not None:
+            self._sort_view()
+            self.render()
+        else:
+            self.offset = max(0, len(self.view) - self.visible_rows)
+            self.render()
+
+    def remove(self, record_ids):
+        """Удаление записей из отображения"""
+        removed = set(record_ids)
+        self.view = [i for i in self.view if i not in removed]
+        self._selected -= removed
+        self.render()
+
+    def clear(self):
+        """Очистка отображения за постоянное время"""
+        self.view = []
+        self.offset = 0
+        self._selected = set()
+        self.render()
+
+    def selection(self):
+        """Номера выделенных записей (включая прокрученные за пределы экрана)"""
+        return sorted(self._selected)
+
+    # --- Сортировка ---
+
+    def sort_by(self, column_index):
+        """Сортировка по столбцу; повторный щелчок меняет направление"""
+        if self.sort_key is None:
+            return
+        if self.sort_column == column_index:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column, self.sort_reverse = column_index, False
+        self._sort_view()
+        self.offset = 0
+        self.render()
+
+    def _sort_view(self):
+        self.view.sort(key=self.sort_key(self.sort_column), reverse=self.sort_reverse)
+        for index, col in enumerate(self.columns):
+            mark = (" ▼" if self.sort_reverse else " ▲") if index == self.sort_column else ""
+            self.tree.heading(col, text=col + mark)
+
+    # --- Отображение ---
+
+    def render(self):
+        """Перерисовка видимого окна строк"""
+        self.offset = max(0, min(self.offset, len(self.view) - self.visible_rows))
+        window = self.view[self.offset:self.offset + self.visible_rows]
+
+        self._rendering = True
+        try:
+            self.tree.delete(*self.tree.get_children())
+            for record_id in window:
+                self.tree.insert("", "end", iid=str(record_id), values=self.row_source(record_id))
+            visible_selected = [str(i) for i in window if i in self._selected]
+            self.tree.selection_set(visible_selected)
+        finally:
+            self._rendering = False
+
+        total = len(self.view)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + len(window)) / total)
+
+    def scroll(self, rows):
+        """Прокрутка на заданное число строк"""
+        self.offset += rows
+        self.render()
+
+    def on_scrollbar(self, action, value, units=None):
+        """Обработка команд полосы прокрутки"""
+        if action == "moveto":
+            self.offset = int(float(value) * len(self.view))
+        elif action == "scroll":
+            step = self.visible_rows if units == "pages" else 1
+            self.offset += int(value) * step
+        self.render()
+
+    def on_mousewheel(self, event):
+        self.scroll(-3 if event.delta > 0 else 3)
+        return "break"
+
+    def on_resize(self, event):
+        """Пересчет числа видимых строк при изменении размера окна"""
+        style = ttk.Style()
+        row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        rows = max(1, (event.height - row_height - 6) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+
+    def on_select(self, event):
+        if self._rendering:
+            return
+        visible = {int(item) for item in self.tree.get_children()}
+        current = {int(item) for item in self.tree.selection()}
+        self._selected = (self._selected - visible) | current